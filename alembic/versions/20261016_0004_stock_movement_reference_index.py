@@ -0,0 +1,42 @@
+"""Index stock movement references.
+
+Revision ID: 20261016_0004
+Revises: 20260215_0003
+Create Date: 2026-10-16 09:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_0004"
+down_revision = "20260215_0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    def has_index(table_name: str, index_name: str) -> bool:
+        if table_name not in existing_tables:
+            return False
+        return index_name in {idx["name"] for idx in inspector.get_indexes(table_name)}
+
+    if "stock_movements" in existing_tables and not has_index("stock_movements", "ix_stock_movements_reference"):
+        op.create_index("ix_stock_movements_reference", "stock_movements", ["reference"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    if "stock_movements" in existing_tables:
+        indexes = {idx["name"] for idx in inspector.get_indexes("stock_movements")}
+        if "ix_stock_movements_reference" in indexes:
+            op.drop_index("ix_stock_movements_reference", table_name="stock_movements")
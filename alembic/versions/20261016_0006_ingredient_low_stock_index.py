@@ -0,0 +1,47 @@
+"""Add partial index for low-stock ingredients.
+
+Revision ID: 20261016_0006
+Revises: 20261016_0005
+Create Date: 2026-10-16 10:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_0006"
+down_revision = "20261016_0005"
+branch_labels = None
+depends_on = None
+
+LOW_STOCK_PREDICATE = "current_stock <= reorder_level"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    if "ingredients" in existing_tables:
+        indexes = {idx["name"] for idx in inspector.get_indexes("ingredients")}
+        if "ix_ingredients_low_stock" not in indexes:
+            op.create_index(
+                "ix_ingredients_low_stock",
+                "ingredients",
+                ["id"],
+                postgresql_where=sa.text(LOW_STOCK_PREDICATE),
+                sqlite_where=sa.text(LOW_STOCK_PREDICATE),
+            )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    if "ingredients" in existing_tables:
+        indexes = {idx["name"] for idx in inspector.get_indexes("ingredients")}
+        if "ix_ingredients_low_stock" in indexes:
+            op.drop_index("ix_ingredients_low_stock", table_name="ingredients")
@@ -0,0 +1,47 @@
+"""Add covering index for recipe lookups (Postgres).
+
+Revision ID: 20261016_0007
+Revises: 20261016_0006
+Create Date: 2026-10-16 10:30:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_0007"
+down_revision = "20261016_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # Other backends rely on the uq_recipe_item_ingredient index, which leads with menu_item_id.
+        return
+    inspector = sa.inspect(bind)
+    if "recipe_lines" not in set(inspector.get_table_names()):
+        return
+    indexes = {idx["name"] for idx in inspector.get_indexes("recipe_lines")}
+    if "ix_recipe_lines_menu_item_covering" not in indexes:
+        op.create_index(
+            "ix_recipe_lines_menu_item_covering",
+            "recipe_lines",
+            ["menu_item_id"],
+            postgresql_include=["ingredient_id", "quantity"],
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    inspector = sa.inspect(bind)
+    if "recipe_lines" not in set(inspector.get_table_names()):
+        return
+    indexes = {idx["name"] for idx in inspector.get_indexes("recipe_lines")}
+    if "ix_recipe_lines_menu_item_covering" in indexes:
+        op.drop_index("ix_recipe_lines_menu_item_covering", table_name="recipe_lines")
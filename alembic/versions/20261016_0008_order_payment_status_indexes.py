@@ -0,0 +1,56 @@
+"""Add composite payment status indexes on orders.
+
+Revision ID: 20261016_0008
+Revises: 20261016_0007
+Create Date: 2026-10-16 13:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_0008"
+down_revision = "20261016_0007"
+branch_labels = None
+depends_on = None
+
+ORDER_INDEXES = {
+    "ix_orders_pstatus_paidat": ["payment_status", "paid_at"],
+    "ix_orders_pstatus_updatedat": ["payment_status", "updated_at"],
+}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    if "orders" not in existing_tables:
+        return
+    indexes = {idx["name"] for idx in inspector.get_indexes("orders")}
+    missing = {name: columns for name, columns in ORDER_INDEXES.items() if name not in indexes}
+    if not missing:
+        return
+
+    if bind.dialect.name == "postgresql":
+        # CONCURRENTLY cannot run inside the migration transaction.
+        with op.get_context().autocommit_block():
+            for name, columns in missing.items():
+                op.create_index(name, "orders", columns, postgresql_concurrently=True)
+    else:
+        for name, columns in missing.items():
+            op.create_index(name, "orders", columns)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    if "orders" in existing_tables:
+        indexes = {idx["name"] for idx in inspector.get_indexes("orders")}
+        for name in ORDER_INDEXES:
+            if name in indexes:
+                op.drop_index(name, table_name="orders")
@@ -25,7 +25,15 @@ class Settings:
     app_env: str = os.getenv("APP_ENV", "development")
     auth_disabled: bool = _env_bool("AUTH_DISABLED", True)
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./breakfast.db")
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    db_pool_timeout: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
     redis_url: str = os.getenv("REDIS_URL", "").strip()
+    redis_pool_size: int = int(os.getenv("REDIS_POOL_SIZE", "20"))
+    redis_error_threshold: int = int(os.getenv("REDIS_ERROR_THRESHOLD", "3"))
+    redis_error_cooldown_seconds: int = int(os.getenv("REDIS_ERROR_COOLDOWN_SECONDS", "30"))
+    redis_error_max_cooldown_seconds: int = int(os.getenv("REDIS_ERROR_MAX_COOLDOWN_SECONDS", "300"))
     trust_proxy_headers: bool = _env_bool("TRUST_PROXY_HEADERS", False)
     cors_origins: str = os.getenv("CORS_ORIGINS", "")
     token_expire_minutes: int = int(os.getenv("TOKEN_EXPIRE_MINUTES", "720"))
@@ -2,19 +2,37 @@ from __future__ import annotations
 
 from collections.abc import Generator
 
+import orjson
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.config import settings
 
 connect_args = {}
+pool_options = {}
 if settings.database_url.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
+    if ":memory:" in settings.database_url or settings.database_url.endswith("://"):
+        # An in-memory database lives and dies with its connection; share one across threads.
+        pool_options = {"poolclass": StaticPool}
+else:
+    # Per process: pool_size + max_overflow connections at most. Keep
+    # workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below the server's max_connections.
+    pool_options = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+    }
 
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
     connect_args=connect_args,
+    **pool_options,
+    json_serializer=lambda obj: orjson.dumps(obj).decode("utf-8"),
+    json_deserializer=orjson.loads,
 )
 SessionLocal = sessionmaker(
     autocommit=False,
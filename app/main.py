@@ -7,6 +7,7 @@ from pathlib import Path
 
 from fastapi import Depends, FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy import select, text
 from sqlalchemy.exc import SQLAlchemyError
@@ -45,7 +46,8 @@ async def lifespan(_: FastAPI):
         await login_rate_limiter.close()
 
 
-app = FastAPI(title=settings.app_name, lifespan=lifespan)
+# orjson for every JSON response: the list endpoints (menu, inventory, orders) are the chatty ones.
+app = FastAPI(title=settings.app_name, lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # ---------------------------------------------------------------------------
 # CORS — refuse wildcard in production
@@ -7,17 +7,23 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     JSON,
+    Sequence,
     String,
     Text,
     UniqueConstraint,
     func,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
 
+# Postgres-only source of order numbers; SQLite ignores sequences and falls back to generated numbers.
+order_number_seq = Sequence("order_number_seq", metadata=Base.metadata)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -77,6 +83,14 @@ class MenuItem(Base):
 
 class Ingredient(Base):
     __tablename__ = "ingredients"
+    __table_args__ = (
+        Index(
+            "ix_ingredients_low_stock",
+            "id",
+            postgresql_where=text("current_stock <= reorder_level"),
+            sqlite_where=text("current_stock <= reorder_level"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(120), unique=True, index=True)
@@ -101,7 +115,16 @@ class Ingredient(Base):
 
 class RecipeLine(Base):
     __tablename__ = "recipe_lines"
-    __table_args__ = (UniqueConstraint("menu_item_id", "ingredient_id", name="uq_recipe_item_ingredient"),)
+    __table_args__ = (
+        UniqueConstraint("menu_item_id", "ingredient_id", name="uq_recipe_item_ingredient"),
+        # The unique constraint already indexes (menu_item_id, ingredient_id); on Postgres the
+        # covering index also carries quantity so requirement lookups are index-only.
+        Index(
+            "ix_recipe_lines_menu_item_covering",
+            "menu_item_id",
+            postgresql_include=["ingredient_id", "quantity"],
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     menu_item_id: Mapped[int] = mapped_column(ForeignKey("menu_items.id", ondelete="CASCADE"), nullable=False)
@@ -175,6 +198,11 @@ class ComboSideOption(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Shift close filters by payment_status plus a paid_at / updated_at range.
+        Index("ix_orders_pstatus_paidat", "payment_status", "paid_at"),
+        Index("ix_orders_pstatus_updatedat", "payment_status", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     order_number: Mapped[str] = mapped_column(String(40), unique=True, index=True)
@@ -220,7 +248,7 @@ class StockMovement(Base):
     movement_type: Mapped[str] = mapped_column(String(20), nullable=False)
     quantity: Mapped[float] = mapped_column(Float, nullable=False)
     unit_cost: Mapped[float | None] = mapped_column(Float, nullable=True)
-    reference: Mapped[str | None] = mapped_column(String(80), nullable=True)
+    reference: Mapped[str | None] = mapped_column(String(80), nullable=True, index=True)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
@@ -13,6 +16,8 @@ from app.security import create_access_token, hash_password, verify_password
 from app.services.audit import create_audit_log
 from app.services.rate_limit import login_rate_limiter
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
@@ -29,22 +34,16 @@ def _login_identity(request: Request, username: str) -> str:
     return f"{_resolve_client_ip(request)}::{username.strip().lower()}"
 
 
-@router.post("/login", response_model=LoginResponse)
-async def login(payload: LoginRequest, request: Request, db: Session = Depends(get_db)) -> LoginResponse:
-    identity = _login_identity(request, payload.username)
-    if await login_rate_limiter.should_block(identity):
-        raise HTTPException(status_code=429, detail="Too many login attempts. Please try again later.")
-
-    user = db.scalar(select(User).where(User.username == payload.username))
+def _authenticate(db: Session, username: str, password: str) -> User | None:
+    user = db.scalar(select(User).where(User.username == username))
     if not user or not user.is_active:
-        await login_rate_limiter.add_failure(identity)
-        raise HTTPException(status_code=401, detail="Invalid username or password")
-    if not verify_password(payload.password, user.password_hash):
-        await login_rate_limiter.add_failure(identity)
-        raise HTTPException(status_code=401, detail="Invalid username or password")
+        return None
+    if not verify_password(password, user.password_hash):
+        return None
+    return user
 
-    await login_rate_limiter.reset(identity)
-    token, expires_at = create_access_token(user_id=user.id, username=user.username, role=user.role)
+
+def _record_login(db: Session, user: User) -> None:
     create_audit_log(
         db,
         actor=user,
@@ -54,6 +53,25 @@ async def login(payload: LoginRequest, request: Request, db: Session = Depends(g
         payload={},
     )
     db.commit()
+
+
+@router.post("/login", response_model=LoginResponse)
+async def login(payload: LoginRequest, request: Request, db: Session = Depends(get_db)) -> LoginResponse:
+    identity = _login_identity(request, payload.username)
+    if await login_rate_limiter.should_block(identity):
+        raise HTTPException(status_code=429, detail="Too many login attempts. Please try again later.")
+
+    # DB lookups and password hashing are blocking; keep them off the event loop.
+    user = await run_in_threadpool(_authenticate, db, payload.username, payload.password)
+    if not user:
+        # The increment already reports the new state; no second limiter round trip is needed.
+        if await login_rate_limiter.add_failure(identity):
+            logger.warning("Login attempts exhausted for %s; further attempts are blocked.", identity)
+        raise HTTPException(status_code=401, detail="Invalid username or password")
+
+    await login_rate_limiter.reset(identity)
+    token, expires_at = create_access_token(user_id=user.id, username=user.username, role=user.role)
+    await run_in_threadpool(_record_login, db, user)
     return LoginResponse(
         access_token=token,
         expires_at=expires_at.isoformat(),
@@ -93,7 +111,7 @@ def create_user(
     user = User(
         username=payload.username,
         password_hash=hash_password(payload.password),
-        role=payload.role.value,
+        role=payload.role,
         is_active=payload.is_active,
     )
     db.add(user)
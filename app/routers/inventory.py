@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
@@ -12,6 +12,7 @@ from app.schemas import (
     IngredientOut,
     IngredientUpdate,
     LowStockOut,
+    MovementType,
     StockMovementCreate,
     StockMovementOut,
     UserRole,
@@ -24,10 +25,14 @@ router = APIRouter(prefix="/inventory", tags=["inventory"])
 
 @router.get("/ingredients", response_model=list[IngredientOut])
 def list_ingredients(
+    names: list[str] | None = Query(default=None),
     db: Session = Depends(get_db),
     _: object = Depends(require_roles(UserRole.manager, UserRole.owner)),
 ) -> list[Ingredient]:
-    return db.scalars(select(Ingredient).order_by(Ingredient.id)).all()
+    stmt = select(Ingredient)
+    if names:
+        stmt = stmt.where(Ingredient.name.in_(names))
+    return db.scalars(stmt.order_by(Ingredient.id)).all()
 
 
 @router.post("/ingredients", response_model=IngredientOut, status_code=201)
@@ -110,7 +115,7 @@ def create_stock_movement(
     movement = apply_manual_movement(
         db,
         ingredient_id=payload.ingredient_id,
-        movement_type=payload.movement_type,
+        movement_type=MovementType(payload.movement_type),
         quantity=payload.quantity,
         unit_cost=payload.unit_cost,
         reference=payload.reference,
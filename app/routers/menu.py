@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import hashlib
 from collections import Counter
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload
 
@@ -17,28 +21,44 @@ from app.schemas import (
     ComboRuleUpdate,
     ComboSideOptionIn,
     ComboSideOptionOut,
+    MenuItemBulkUpsert,
     MenuItemCreate,
     MenuItemOut,
     MenuItemUpdate,
     RecipeLineIn,
     RecipeLineOut,
     UserRole,
+    menu_item_to_dict,
 )
 from app.services.audit import create_audit_log
+from app.services.inventory import clear_recipe_cache
 
 router = APIRouter(prefix="/menu", tags=["menu"])
 
 
+def _etag_json_response(request: Request, payload: list) -> Response:
+    """JSON response with a content ETag; a matching If-None-Match gets an empty 304."""
+    body = orjson.dumps(payload)
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get("/items", response_model=list[MenuItemOut])
 def list_menu_items(
+    request: Request,
     active_only: bool = True,
     db: Session = Depends(get_db),
     _: object = Depends(require_roles(UserRole.staff, UserRole.kitchen, UserRole.manager, UserRole.owner)),
-) -> list[MenuItem]:
+) -> Response:
     stmt = select(MenuItem)
     if active_only:
         stmt = stmt.where(MenuItem.is_active.is_(True))
-    return db.scalars(stmt.order_by(MenuItem.id)).all()
+    rows = db.scalars(stmt.order_by(MenuItem.id)).all()
+    return _etag_json_response(request, [menu_item_to_dict(row) for row in rows])
 
 
 def _combo_query():
@@ -143,15 +163,16 @@ def _combo_to_out(row: ComboRule) -> ComboRuleOut:
 
 @router.get("/combos", response_model=list[ComboRuleOut])
 def list_combo_rules(
+    request: Request,
     active_only: bool = True,
     db: Session = Depends(get_db),
     _: object = Depends(require_roles(UserRole.staff, UserRole.kitchen, UserRole.manager, UserRole.owner)),
-) -> list[ComboRuleOut]:
+) -> Response:
     stmt = _combo_query()
     if active_only:
         stmt = stmt.where(ComboRule.is_active.is_(True))
     rows = db.execute(stmt).scalars().unique().all()
-    return [_combo_to_out(row) for row in rows]
+    return _etag_json_response(request, [_combo_to_out(row).model_dump() for row in rows])
 
 
 @router.get("/combos/{combo_id}", response_model=ComboRuleOut)
@@ -375,6 +396,80 @@ def create_menu_item(
     return row
 
 
+def _upsert_menu_items_by_name(db: Session, rows: list[dict]) -> None:
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        stmt = insert(MenuItem)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MenuItem.name],
+            # ON CONFLICT skips the ORM's onupdate hook, so bump updated_at explicitly.
+            set_={"price": stmt.excluded.price, "is_active": stmt.excluded.is_active, "updated_at": func.now()},
+        )
+        db.execute(stmt, rows)
+        return
+
+    existing = {
+        row.name: row for row in db.scalars(select(MenuItem).where(MenuItem.name.in_([r["name"] for r in rows])))
+    }
+    for data in rows:
+        row = existing.get(data["name"])
+        if row:
+            row.price = data["price"]
+            row.is_active = data["is_active"]
+        else:
+            db.add(MenuItem(**data))
+
+
+@router.post("/items/bulk-upsert", response_model=list[MenuItemOut])
+def bulk_upsert_menu_items(
+    payload: MenuItemBulkUpsert,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles(UserRole.manager, UserRole.owner)),
+) -> list[MenuItem]:
+    """Create or update many menu items in one transaction.
+
+    Lines carrying an ``id`` update that row (including renames); lines without one are
+    upserted by ``name``.
+    """
+    names = [line.name for line in payload.items]
+    duplicates = sorted(name for name, count in Counter(names).items() if count > 1)
+    if duplicates:
+        raise HTTPException(status_code=400, detail=f"Duplicate menu item names: {duplicates}")
+
+    by_id = [line.model_dump() for line in payload.items if line.id is not None]
+    by_name = [line.model_dump(exclude={"id"}) for line in payload.items if line.id is None]
+    if by_id:
+        ids = {line["id"] for line in by_id}
+        existing_ids = set(db.scalars(select(MenuItem.id).where(MenuItem.id.in_(ids))))
+        missing = sorted(ids - existing_ids)
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Unknown menu item ids: {missing}")
+
+    try:
+        if by_id:
+            db.execute(update(MenuItem), by_id)
+        if by_name:
+            _upsert_menu_items_by_name(db, by_name)
+        create_audit_log(
+            db,
+            actor=current_user,
+            action="menu.bulk_upsert",
+            entity_type="menu_item",
+            entity_id=None,
+            payload={"updated": len(by_id), "upserted": len(by_name)},
+        )
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Menu items conflict with existing data")
+
+    db.expire_all()
+    positions = {name: index for index, name in enumerate(names)}
+    rows = db.scalars(select(MenuItem).where(MenuItem.name.in_(names))).all()
+    return sorted(rows, key=lambda row: positions[row.name])
+
+
 @router.put("/items/{item_id}", response_model=MenuItemOut)
 def update_menu_item(
     item_id: int,
@@ -464,5 +559,6 @@ def replace_recipe(
         payload={"lines": [line.model_dump() for line in payload]},
     )
     db.commit()
+    clear_recipe_cache(item_id)
 
     return get_recipe(item_id=item_id, db=db)
@@ -2,9 +2,12 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, selectinload
 
 from app.auth import require_roles
 from app.database import get_db
@@ -13,11 +16,14 @@ from app.schemas import (
     OrderAmendRequest,
     OrderAmendResponse,
     OrderCreate,
+    OrderDiffOut,
     OrderOut,
     OrderPayRequest,
+    OrderStatus,
     OrderStatusUpdate,
     PickupBoardOrderOut,
     UserRole,
+    order_to_dict,
 )
 from app.services.audit import create_audit_log
 from app.services.orders import amend_order, create_order, fetch_order_with_items, pay_order, update_order_status
@@ -26,26 +32,34 @@ from app.ws import manager
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 
-def _load_order_or_404(db: Session, order_id: int) -> Order:
-    row = fetch_order_with_items(db, order_id)
+class _OrderListResponse(ORJSONResponse):
+    """Writes UTC datetimes with a ``Z`` suffix, as the pydantic-serialized OrderOut endpoints do."""
+
+    def render(self, content: object) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+def _load_order_or_404(db: Session, order_id: int, *, with_recipes: bool = False) -> Order:
+    row = fetch_order_with_items(db, order_id, with_recipes=with_recipes)
     if not row:
         raise HTTPException(status_code=404, detail="Order not found")
     return row
 
 
-@router.get("", response_model=list[OrderOut])
+@router.get("", response_model=list[OrderOut], response_class=_OrderListResponse)
 def list_orders(
     status: str | None = None,
     limit: int = 100,
     db: Session = Depends(get_db),
     _: object = Depends(require_roles(UserRole.staff, UserRole.kitchen, UserRole.manager, UserRole.owner)),
-) -> list[Order]:
+) -> _OrderListResponse:
     capped = max(1, min(limit, 500))
-    stmt = select(Order).options(joinedload(Order.items)).order_by(Order.created_at.desc()).limit(capped)
+    stmt = select(Order).options(selectinload(Order.items)).order_by(Order.created_at.desc()).limit(capped)
     if status:
         stmt = stmt.where(Order.status == status)
-    rows = db.execute(stmt).scalars().unique().all()
-    return rows
+    rows = db.scalars(stmt).all()
+    # Rows come straight from the DB; serialize without re-validating through OrderOut.
+    return _OrderListResponse([order_to_dict(row) for row in rows])
 
 
 @router.get("/pickup-board", response_model=list[PickupBoardOrderOut])
@@ -83,27 +97,29 @@ async def create_new_order(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles(UserRole.staff, UserRole.manager, UserRole.owner)),
 ) -> Order:
-    try:
-        row, low_stock = create_order(db, payload)
-        create_audit_log(
-            db,
-            actor=current_user,
-            action="order.create",
-            entity_type="order",
-            entity_id=row.id,
-            payload={
-                "source": row.source,
-                "payment_status": row.payment_status,
-                "total_amount": row.total_amount,
-                "item_count": len(row.items),
-            },
-        )
-        db.commit()
-    except Exception:
-        db.rollback()
-        raise
+    def run() -> tuple[Order, list[dict]]:
+        try:
+            row, low_stock = create_order(db, payload)
+            create_audit_log(
+                db,
+                actor=current_user,
+                action="order.create",
+                entity_type="order",
+                entity_id=row.id,
+                payload={
+                    "source": row.source,
+                    "payment_status": row.payment_status,
+                    "total_amount": row.total_amount,
+                    "item_count": len(row.items),
+                },
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return _load_order_or_404(db, row.id), low_stock
 
-    row = _load_order_or_404(db, row.id)
+    row, low_stock = await run_in_threadpool(run)
     await manager.broadcast(
         {
             "event": "order_created",
@@ -125,27 +141,29 @@ async def pay_order_now(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles(UserRole.staff, UserRole.manager, UserRole.owner)),
 ) -> Order:
-    row = _load_order_or_404(db, order_id)
-    try:
-        low_stock = pay_order(db, row, payload.payment_method if payload else None)
-        create_audit_log(
-            db,
-            actor=current_user,
-            action="order.pay",
-            entity_type="order",
-            entity_id=row.id,
-            payload={
-                "payment_status": row.payment_status,
-                "payment_method": row.payment_method,
-                "low_stock_count": len(low_stock),
-            },
-        )
-        db.commit()
-    except Exception:
-        db.rollback()
-        raise
+    def run() -> tuple[Order, list[dict]]:
+        row = _load_order_or_404(db, order_id, with_recipes=True)
+        try:
+            low_stock = pay_order(db, row, payload.payment_method if payload else None)
+            create_audit_log(
+                db,
+                actor=current_user,
+                action="order.pay",
+                entity_type="order",
+                entity_id=row.id,
+                payload={
+                    "payment_status": row.payment_status,
+                    "payment_method": row.payment_method,
+                    "low_stock_count": len(low_stock),
+                },
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return _load_order_or_404(db, order_id), low_stock
 
-    row = _load_order_or_404(db, order_id)
+    row, low_stock = await run_in_threadpool(run)
     await manager.broadcast(
         {
             "event": "order_paid",
@@ -166,27 +184,31 @@ async def amend_order_now(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles(UserRole.staff, UserRole.manager, UserRole.owner)),
 ) -> OrderAmendResponse:
-    row = _load_order_or_404(db, order_id)
-    try:
-        updated, diff, low_stock = amend_order(db, row, payload)
-        has_changes = bool(diff.added or diff.removed or diff.quantity_changed)
-        diff_payload = diff.model_dump() if has_changes else {}
+    def run() -> tuple[Order, OrderDiffOut, list[dict], bool, dict]:
+        row = _load_order_or_404(db, order_id)
+        try:
+            updated, diff, low_stock = amend_order(db, row, payload)
+            has_changes = bool(diff.added or diff.removed or diff.quantity_changed)
+            diff_payload = diff.model_dump() if has_changes else {}
+            if has_changes:
+                create_audit_log(
+                    db,
+                    actor=current_user,
+                    action="order.amend",
+                    entity_type="order",
+                    entity_id=updated.id,
+                    payload=diff_payload,
+                )
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
         if has_changes:
-            create_audit_log(
-                db,
-                actor=current_user,
-                action="order.amend",
-                entity_type="order",
-                entity_id=updated.id,
-                payload=diff_payload,
-            )
-            db.commit()
-    except Exception:
-        db.rollback()
-        raise
+            updated = _load_order_or_404(db, updated.id)
+        return updated, diff, low_stock, has_changes, diff_payload
 
+    updated, diff, low_stock, has_changes, diff_payload = await run_in_threadpool(run)
     if has_changes:
-        updated = _load_order_or_404(db, updated.id)
         await manager.broadcast(
             {
                 "event": "order_amended",
@@ -208,23 +230,25 @@ async def change_order_status(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles(UserRole.kitchen, UserRole.manager, UserRole.owner)),
 ) -> Order:
-    row = _load_order_or_404(db, order_id)
-    try:
-        updated = update_order_status(db, row, payload.status)
-        create_audit_log(
-            db,
-            actor=current_user,
-            action="order.status.change",
-            entity_type="order",
-            entity_id=updated.id,
-            payload={"status": updated.status},
-        )
-        db.commit()
-    except Exception:
-        db.rollback()
-        raise
+    def run() -> Order:
+        row = _load_order_or_404(db, order_id, with_recipes=payload.status == OrderStatus.cancelled.value)
+        try:
+            updated = update_order_status(db, row, OrderStatus(payload.status))
+            create_audit_log(
+                db,
+                actor=current_user,
+                action="order.status.change",
+                entity_type="order",
+                entity_id=updated.id,
+                payload={"status": updated.status},
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return _load_order_or_404(db, updated.id)
 
-    updated = _load_order_or_404(db, updated.id)
+    updated = await run_in_threadpool(run)
     await manager.broadcast(
         {
             "event": "order_status_changed",
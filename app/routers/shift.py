@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
@@ -41,17 +42,21 @@ async def open_new_shift(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles(UserRole.manager, UserRole.owner)),
 ) -> ShiftSession:
-    row = open_shift(db, payload=payload, actor=current_user)
-    create_audit_log(
-        db,
-        actor=current_user,
-        action="shift.open",
-        entity_type="shift_session",
-        entity_id=row.id,
-        payload={"shift_name": row.shift_name, "opening_cash": row.opening_cash},
-    )
-    db.commit()
-    db.refresh(row)
+    def run() -> ShiftSession:
+        row = open_shift(db, payload=payload, actor=current_user)
+        create_audit_log(
+            db,
+            actor=current_user,
+            action="shift.open",
+            entity_type="shift_session",
+            entity_id=row.id,
+            payload={"shift_name": row.shift_name, "opening_cash": row.opening_cash},
+        )
+        db.commit()
+        db.refresh(row)
+        return row
+
+    row = await run_in_threadpool(run)
     await manager.broadcast(
         {
             "event": "shift_opened",
@@ -70,23 +75,27 @@ async def close_current_shift(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles(UserRole.manager, UserRole.owner)),
 ) -> ShiftSession:
-    row = close_shift(db, payload=payload, actor=current_user)
-    create_audit_log(
-        db,
-        actor=current_user,
-        action="shift.close",
-        entity_type="shift_session",
-        entity_id=row.id,
-        payload={
-            "actual_cash": row.actual_cash,
-            "expected_cash": row.expected_cash,
-            "cash_difference": row.cash_difference,
-            "total_revenue": row.total_revenue,
-            "paid_order_count": row.paid_order_count,
-        },
-    )
-    db.commit()
-    db.refresh(row)
+    def run() -> ShiftSession:
+        row = close_shift(db, payload=payload, actor=current_user)
+        create_audit_log(
+            db,
+            actor=current_user,
+            action="shift.close",
+            entity_type="shift_session",
+            entity_id=row.id,
+            payload={
+                "actual_cash": row.actual_cash,
+                "expected_cash": row.expected_cash,
+                "cash_difference": row.cash_difference,
+                "total_revenue": row.total_revenue,
+                "paid_order_count": row.paid_order_count,
+            },
+        )
+        db.commit()
+        db.refresh(row)
+        return row
+
+    row = await run_in_threadpool(run)
     await manager.broadcast(
         {
             "event": "shift_closed",
@@ -2,9 +2,13 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
+from typing import TYPE_CHECKING, Literal
 
 from pydantic import BaseModel, Field, model_validator
 
+if TYPE_CHECKING:
+    from app.models import MenuItem, Order, OrderItem
+
 
 class SourceType(str, Enum):
     dine_in = "dine_in"
@@ -12,6 +16,9 @@ class SourceType(str, Enum):
     delivery = "delivery"
 
 
+SourceTypeT = Literal["dine_in", "takeout", "delivery"]
+
+
 class OrderStatus(str, Enum):
     pending = "pending"
     preparing = "preparing"
@@ -20,12 +27,18 @@ class OrderStatus(str, Enum):
     cancelled = "cancelled"
 
 
+OrderStatusT = Literal["pending", "preparing", "ready", "completed", "cancelled"]
+
+
 class PaymentStatus(str, Enum):
     unpaid = "unpaid"
     paid = "paid"
     refunded = "refunded"
 
 
+PaymentStatusT = Literal["unpaid", "paid", "refunded"]
+
+
 class PaymentMethod(str, Enum):
     cash = "cash"
     line_pay = "line_pay"
@@ -34,6 +47,9 @@ class PaymentMethod(str, Enum):
     other = "other"
 
 
+PaymentMethodT = Literal["cash", "line_pay", "credit_card", "easycard", "other"]
+
+
 class MovementType(str, Enum):
     purchase = "purchase"
     adjustment = "adjustment"
@@ -41,6 +57,9 @@ class MovementType(str, Enum):
     usage = "usage"
 
 
+MovementTypeT = Literal["purchase", "adjustment", "waste", "usage"]
+
+
 class UserRole(str, Enum):
     staff = "staff"
     kitchen = "kitchen"
@@ -48,6 +67,20 @@ class UserRole(str, Enum):
     owner = "owner"
 
 
+UserRoleT = Literal["staff", "kitchen", "manager", "owner"]
+
+
+class _FastModel(BaseModel):
+    """Base for hot response models: core schema is built lazily on first use."""
+
+    model_config = {
+        "from_attributes": True,
+        "defer_build": True,
+        "extra": "ignore",
+        "populate_by_name": True,
+    }
+
+
 class LoginRequest(BaseModel):
     username: str = Field(min_length=1, max_length=80)
     password: str = Field(min_length=4, max_length=128)
@@ -56,7 +89,7 @@ class LoginRequest(BaseModel):
 class UserOut(BaseModel):
     id: int
     username: str
-    role: UserRole
+    role: UserRoleT
     is_active: bool
 
     model_config = {"from_attributes": True}
@@ -65,7 +98,7 @@ class UserOut(BaseModel):
 class UserCreate(BaseModel):
     username: str = Field(min_length=1, max_length=80)
     password: str = Field(min_length=8, max_length=128)
-    role: UserRole
+    role: UserRoleT
     is_active: bool = True
 
 
@@ -88,13 +121,27 @@ class MenuItemUpdate(BaseModel):
     is_active: bool | None = None
 
 
-class MenuItemOut(BaseModel):
+class MenuItemUpsert(BaseModel):
+    id: int | None = None
+    name: str = Field(min_length=1, max_length=120)
+    price: float = Field(gt=0)
+    is_active: bool = True
+
+
+class MenuItemBulkUpsert(BaseModel):
+    items: list[MenuItemUpsert] = Field(min_length=1, max_length=1000)
+
+
+class MenuItemOut(_FastModel):
     id: int
     name: str
     price: float
     is_active: bool
 
-    model_config = {"from_attributes": True}
+
+def menu_item_to_dict(item: MenuItem) -> dict:
+    """MenuItemOut-shaped dict built straight from trusted ORM attributes."""
+    return {"id": item.id, "name": item.name, "price": item.price, "is_active": item.is_active}
 
 
 class ComboSideOptionIn(BaseModel):
@@ -180,7 +227,7 @@ class IngredientUpdate(BaseModel):
     cost_per_unit: float | None = None
 
 
-class IngredientOut(BaseModel):
+class IngredientOut(_FastModel):
     id: int
     name: str
     unit: str
@@ -188,30 +235,26 @@ class IngredientOut(BaseModel):
     reorder_level: float
     cost_per_unit: float
 
-    model_config = {"from_attributes": True}
-
 
 class StockMovementCreate(BaseModel):
     ingredient_id: int
-    movement_type: MovementType
+    movement_type: MovementTypeT
     quantity: float = Field(gt=0)
     unit_cost: float | None = None
     reference: str | None = None
     notes: str | None = None
 
 
-class StockMovementOut(BaseModel):
+class StockMovementOut(_FastModel):
     id: int
     ingredient_id: int
-    movement_type: MovementType
+    movement_type: MovementTypeT
     quantity: float
     unit_cost: float | None
     reference: str | None
     notes: str | None
     created_at: datetime
 
-    model_config = {"from_attributes": True}
-
 
 class OrderItemCreate(BaseModel):
     menu_item_id: int
@@ -227,9 +270,9 @@ class OrderComboCreate(BaseModel):
 
 
 class OrderCreate(BaseModel):
-    source: SourceType = SourceType.takeout
+    source: SourceTypeT = "takeout"
     auto_pay: bool = True
-    payment_method: PaymentMethod = PaymentMethod.cash
+    payment_method: PaymentMethodT = "cash"
     items: list[OrderItemCreate] = Field(default_factory=list)
     combos: list[OrderComboCreate] = Field(default_factory=list, max_length=50)
 
@@ -240,7 +283,7 @@ class OrderCreate(BaseModel):
         return self
 
 
-class OrderItemOut(BaseModel):
+class OrderItemOut(_FastModel):
     id: int
     menu_item_id: int
     menu_item_name: str
@@ -249,31 +292,57 @@ class OrderItemOut(BaseModel):
     line_total: float
     note: str | None
 
-    model_config = {"from_attributes": True}
-
 
-class OrderOut(BaseModel):
+class OrderOut(_FastModel):
     id: int
     order_number: str
     source: str
-    status: OrderStatus
-    payment_status: PaymentStatus
-    payment_method: PaymentMethod
+    status: OrderStatusT
+    payment_status: PaymentStatusT
+    payment_method: PaymentMethodT
     total_amount: float
     created_at: datetime
     paid_at: datetime | None
     completed_at: datetime | None
     items: list[OrderItemOut]
 
-    model_config = {"from_attributes": True}
+
+def order_item_to_dict(item: OrderItem) -> dict:
+    """OrderItemOut-shaped dict built straight from trusted ORM attributes."""
+    return {
+        "id": item.id,
+        "menu_item_id": item.menu_item_id,
+        "menu_item_name": item.menu_item_name,
+        "quantity": item.quantity,
+        "unit_price": item.unit_price,
+        "line_total": item.line_total,
+        "note": item.note,
+    }
+
+
+def order_to_dict(order: Order) -> dict:
+    """OrderOut-shaped dict for list endpoints that skip response-model validation."""
+    return {
+        "id": order.id,
+        "order_number": order.order_number,
+        "source": order.source,
+        "status": order.status,
+        "payment_status": order.payment_status,
+        "payment_method": order.payment_method,
+        "total_amount": order.total_amount,
+        "created_at": order.created_at,
+        "paid_at": order.paid_at,
+        "completed_at": order.completed_at,
+        "items": [order_item_to_dict(item) for item in order.items],
+    }
 
 
 class OrderStatusUpdate(BaseModel):
-    status: OrderStatus
+    status: OrderStatusT
 
 
 class OrderPayRequest(BaseModel):
-    payment_method: PaymentMethod = PaymentMethod.cash
+    payment_method: PaymentMethodT = "cash"
 
 
 class OrderAmendItemIn(BaseModel):
@@ -310,17 +379,15 @@ class OrderAmendResponse(BaseModel):
     diff: OrderDiffOut
 
 
-class PickupBoardOrderOut(BaseModel):
+class PickupBoardOrderOut(_FastModel):
     id: int
     order_number: str
-    source: SourceType
-    status: OrderStatus
-    payment_status: PaymentStatus
+    source: SourceTypeT
+    status: OrderStatusT
+    payment_status: PaymentStatusT
     created_at: datetime
     completed_at: datetime | None
 
-    model_config = {"from_attributes": True}
-
 
 class TopItemOut(BaseModel):
     menu_item_name: str
@@ -353,7 +420,7 @@ class AnalyticsOverviewOut(BaseModel):
     daily_sales: list[DailySalesOut]
 
 
-class AuditLogOut(BaseModel):
+class AuditLogOut(_FastModel):
     id: int
     actor_user_id: int | None
     actor_username: str | None
@@ -364,14 +431,15 @@ class AuditLogOut(BaseModel):
     payload: dict | None
     created_at: datetime
 
-    model_config = {"from_attributes": True}
-
 
 class ShiftStatus(str, Enum):
     open = "open"
     closed = "closed"
 
 
+ShiftStatusT = Literal["open", "closed"]
+
+
 class ShiftOpenRequest(BaseModel):
     shift_name: str = Field(min_length=1, max_length=40)
     opening_cash: float = Field(default=0.0, ge=0)
@@ -383,10 +451,10 @@ class ShiftCloseRequest(BaseModel):
     notes: str | None = Field(default=None, max_length=200)
 
 
-class ShiftSessionOut(BaseModel):
+class ShiftSessionOut(_FastModel):
     id: int
     shift_name: str
-    status: ShiftStatus
+    status: ShiftStatusT
     opening_cash: float
     expected_cash: float
     actual_cash: float | None
@@ -403,5 +471,3 @@ class ShiftSessionOut(BaseModel):
     notes: str | None
     opened_at: datetime
     closed_at: datetime | None
-
-    model_config = {"from_attributes": True}
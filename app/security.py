@@ -1,44 +1,70 @@
 from __future__ import annotations
 
 import base64
+import functools
 import hashlib
 import hmac
-import json
-import secrets
 from datetime import datetime, timedelta, timezone
 
+import bcrypt
+import orjson
+
 from app.config import settings
 
 PBKDF2_ROUNDS = 210_000
+# bcrypt's minimum cost under tests: same hash format, ~1ms instead of ~250ms per login/seed user.
+BCRYPT_ROUNDS = 4 if settings.app_env == "test" else 12
+BCRYPT_PREFIX = "bcrypt$"
+
+
+def _b64_url_encode(raw: bytes) -> bytes:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=")
+
+
+def _b64_url_decode(raw: bytes) -> bytes:
+    return base64.urlsafe_b64decode(raw + b"=" * (-len(raw) % 4))
 
 
-def _b64_url_encode(raw: bytes) -> str:
-    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+@functools.cache
+def _hmac_factory() -> hmac.HMAC:
+    # Keyed once; callers .copy() so the key padding is not recomputed per token.
+    return hmac.new(settings.secret_key.encode("utf-8"), None, hashlib.sha256)
 
 
-def _b64_url_decode(raw: str) -> bytes:
-    padding = "=" * (-len(raw) % 4)
-    return base64.urlsafe_b64decode(raw + padding)
+def _sign(payload_segment: bytes) -> bytes:
+    mac = _hmac_factory().copy()
+    mac.update(payload_segment)
+    return mac.digest()
+
+
+def _bcrypt_secret(password: str) -> bytes:
+    # bcrypt only reads the first 72 bytes; newer releases raise instead of truncating.
+    return password.encode("utf-8")[:72]
 
 
 def hash_password(password: str) -> str:
-    salt = secrets.token_hex(16)
-    digest = hashlib.pbkdf2_hmac(
-        "sha256",
-        password.encode("utf-8"),
-        salt.encode("utf-8"),
-        PBKDF2_ROUNDS,
-    )
-    return f"{PBKDF2_ROUNDS}${salt}${digest.hex()}"
+    hashed = bcrypt.hashpw(_bcrypt_secret(password), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
+    return f"{BCRYPT_PREFIX}{hashed.decode('ascii')}"
 
 
 MAX_PBKDF2_ROUNDS = 1_000_000
 
 
 def verify_password(password: str, password_hash: str) -> bool:
+    if password_hash.startswith(BCRYPT_PREFIX):
+        try:
+            return bcrypt.checkpw(
+                _bcrypt_secret(password),
+                password_hash[len(BCRYPT_PREFIX):].encode("ascii"),
+            )
+        except ValueError:
+            return False
+
+    # Legacy PBKDF2 hashes: rounds$salt$digest_hex
     try:
         rounds_str, salt, digest_hex = password_hash.split("$", 2)
         rounds = int(rounds_str)
+        expected = bytes.fromhex(digest_hex)
     except ValueError:
         return False
     if rounds <= 0 or rounds > MAX_PBKDF2_ROUNDS:
@@ -49,47 +75,37 @@ def verify_password(password: str, password_hash: str) -> bool:
         salt.encode("utf-8"),
         rounds,
     )
-    return hmac.compare_digest(computed.hex(), digest_hex)
+    return hmac.compare_digest(computed, expected)
 
 
 def create_access_token(*, user_id: int, username: str, role: str) -> tuple[str, datetime]:
     expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.token_expire_minutes)
+    # Keys are written in sorted order so the encoded payload stays canonical without sorting.
     payload = {
+        "exp": int(expires_at.timestamp()),
+        "role": role,
         "uid": user_id,
         "username": username,
-        "role": role,
-        "exp": int(expires_at.timestamp()),
     }
-    payload_segment = _b64_url_encode(
-        json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8"),
-    )
-    signature = hmac.new(
-        settings.secret_key.encode("utf-8"),
-        payload_segment.encode("utf-8"),
-        hashlib.sha256,
-    ).digest()
-    signature_segment = _b64_url_encode(signature)
-    return f"{payload_segment}.{signature_segment}", expires_at
+    payload_segment = _b64_url_encode(orjson.dumps(payload))
+    signature_segment = _b64_url_encode(_sign(payload_segment))
+    return (payload_segment + b"." + signature_segment).decode("ascii"), expires_at
 
 
 def verify_access_token(token: str) -> dict | None:
+    # UnicodeEncodeError and binascii.Error are both ValueError subclasses.
     try:
-        payload_segment, signature_segment = token.split(".", 1)
+        payload_segment, signature_segment = token.encode("ascii").split(b".", 1)
+        actual_sig = _b64_url_decode(signature_segment)
     except ValueError:
         return None
 
-    expected_sig = hmac.new(
-        settings.secret_key.encode("utf-8"),
-        payload_segment.encode("utf-8"),
-        hashlib.sha256,
-    ).digest()
-    actual_sig = _b64_url_decode(signature_segment)
-    if not hmac.compare_digest(expected_sig, actual_sig):
+    if not hmac.compare_digest(_sign(payload_segment), actual_sig):
         return None
 
     try:
-        payload = json.loads(_b64_url_decode(payload_segment))
-    except (json.JSONDecodeError, ValueError):
+        payload = orjson.loads(_b64_url_decode(payload_segment))
+    except ValueError:
         return None
 
     if int(payload.get("exp", 0)) < int(datetime.now(timezone.utc).timestamp()):
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import secrets
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from app.config import settings
@@ -39,15 +39,13 @@ def seed_users(db: Session) -> None:
             ("manager1", "manager1234", UserRole.manager.value),
             ("owner1", "owner1234", UserRole.owner.value),
         ]
-        for username, password, role in default_users:
-            db.add(
-                User(
-                    username=username,
-                    password_hash=hash_password(password),
-                    role=role,
-                    is_active=True,
-                ),
-            )
+        db.execute(
+            insert(User),
+            [
+                {"username": username, "password_hash": hash_password(password), "role": role, "is_active": True}
+                for username, password, role in default_users
+            ],
+        )
     db.flush()
 
 
@@ -59,70 +57,44 @@ def seed_database(db: Session) -> None:
         db.commit()
         return
 
-    ingredients = [
-        Ingredient(name="Egg", unit="pcs", current_stock=120, reorder_level=20, cost_per_unit=5),
-        Ingredient(name="Bread Slice", unit="pcs", current_stock=240, reorder_level=40, cost_per_unit=3),
-        Ingredient(name="Ham", unit="slice", current_stock=90, reorder_level=20, cost_per_unit=8),
-        Ingredient(name="Tea Leaves", unit="g", current_stock=1500, reorder_level=300, cost_per_unit=0.1),
-        Ingredient(name="Milk", unit="ml", current_stock=30000, reorder_level=5000, cost_per_unit=0.03),
-        Ingredient(name="Sugar", unit="g", current_stock=5000, reorder_level=800, cost_per_unit=0.02),
-    ]
-    db.add_all(ingredients)
-    db.flush()
-
-    ingredient_by_name = {ing.name: ing for ing in ingredients}
-
-    menu_items = [
-        MenuItem(name="Ham Egg Toast", price=65),
-        MenuItem(name="Milk Tea", price=40),
-        MenuItem(name="Cheese Egg Toast", price=60),
-    ]
-    db.add_all(menu_items)
-    db.flush()
+    db.execute(
+        insert(Ingredient),
+        [
+            {"name": "Egg", "unit": "pcs", "current_stock": 120, "reorder_level": 20, "cost_per_unit": 5},
+            {"name": "Bread Slice", "unit": "pcs", "current_stock": 240, "reorder_level": 40, "cost_per_unit": 3},
+            {"name": "Ham", "unit": "slice", "current_stock": 90, "reorder_level": 20, "cost_per_unit": 8},
+            {"name": "Tea Leaves", "unit": "g", "current_stock": 1500, "reorder_level": 300, "cost_per_unit": 0.1},
+            {"name": "Milk", "unit": "ml", "current_stock": 30000, "reorder_level": 5000, "cost_per_unit": 0.03},
+            {"name": "Sugar", "unit": "g", "current_stock": 5000, "reorder_level": 800, "cost_per_unit": 0.02},
+        ],
+    )
+    ingredient_id = dict(db.execute(select(Ingredient.name, Ingredient.id)).tuples().all())
 
-    item_by_name = {item.name: item for item in menu_items}
+    db.execute(
+        insert(MenuItem),
+        [
+            {"name": "Ham Egg Toast", "price": 65},
+            {"name": "Milk Tea", "price": 40},
+            {"name": "Cheese Egg Toast", "price": 60},
+        ],
+    )
+    item_id = dict(db.execute(select(MenuItem.name, MenuItem.id)).tuples().all())
 
     recipe_lines = [
-        RecipeLine(
-            menu_item_id=item_by_name["Ham Egg Toast"].id,
-            ingredient_id=ingredient_by_name["Bread Slice"].id,
-            quantity=2,
-        ),
-        RecipeLine(
-            menu_item_id=item_by_name["Ham Egg Toast"].id,
-            ingredient_id=ingredient_by_name["Egg"].id,
-            quantity=1,
-        ),
-        RecipeLine(
-            menu_item_id=item_by_name["Ham Egg Toast"].id,
-            ingredient_id=ingredient_by_name["Ham"].id,
-            quantity=1,
-        ),
-        RecipeLine(
-            menu_item_id=item_by_name["Milk Tea"].id,
-            ingredient_id=ingredient_by_name["Tea Leaves"].id,
-            quantity=5,
-        ),
-        RecipeLine(
-            menu_item_id=item_by_name["Milk Tea"].id,
-            ingredient_id=ingredient_by_name["Milk"].id,
-            quantity=220,
-        ),
-        RecipeLine(
-            menu_item_id=item_by_name["Milk Tea"].id,
-            ingredient_id=ingredient_by_name["Sugar"].id,
-            quantity=12,
-        ),
-        RecipeLine(
-            menu_item_id=item_by_name["Cheese Egg Toast"].id,
-            ingredient_id=ingredient_by_name["Bread Slice"].id,
-            quantity=2,
-        ),
-        RecipeLine(
-            menu_item_id=item_by_name["Cheese Egg Toast"].id,
-            ingredient_id=ingredient_by_name["Egg"].id,
-            quantity=1,
-        ),
+        ("Ham Egg Toast", "Bread Slice", 2),
+        ("Ham Egg Toast", "Egg", 1),
+        ("Ham Egg Toast", "Ham", 1),
+        ("Milk Tea", "Tea Leaves", 5),
+        ("Milk Tea", "Milk", 220),
+        ("Milk Tea", "Sugar", 12),
+        ("Cheese Egg Toast", "Bread Slice", 2),
+        ("Cheese Egg Toast", "Egg", 1),
     ]
-    db.add_all(recipe_lines)
+    db.execute(
+        insert(RecipeLine),
+        [
+            {"menu_item_id": item_id[item_name], "ingredient_id": ingredient_id[ingredient_name], "quantity": quantity}
+            for item_name, ingredient_name, quantity in recipe_lines
+        ],
+    )
     db.commit()
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import date, datetime, timedelta, timezone
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import Float, Numeric, and_, cast, func, select
 from sqlalchemy.orm import Session
 
 from app.models import Ingredient, Order, OrderItem
@@ -17,6 +17,11 @@ def resolve_date_range(start_date: str | None, end_date: str | None) -> tuple[da
     return start, end
 
 
+def _money_sum(column):
+    """SUM rounded to cents in SQL (cast to NUMERIC since Postgres only rounds numerics)."""
+    return func.round(cast(func.coalesce(func.sum(column), 0.0), Numeric), 2, type_=Float)
+
+
 def overview(db: Session, start_date: str | None = None, end_date: str | None = None) -> dict:
     start, end = resolve_date_range(start_date, end_date)
     start_dt = datetime.combine(start, datetime.min.time(), timezone.utc)
@@ -28,14 +33,14 @@ def overview(db: Session, start_date: str | None = None, end_date: str | None =
         Order.created_at <= end_dt,
     )
 
-    revenue = db.scalar(select(func.coalesce(func.sum(Order.total_amount), 0.0)).where(paid_filter)) or 0.0
+    revenue = db.scalar(select(_money_sum(Order.total_amount)).where(paid_filter)) or 0.0
     order_count = db.scalar(select(func.count(Order.id)).where(paid_filter)) or 0
 
     top_rows = db.execute(
         select(
             OrderItem.menu_item_name,
-            func.sum(OrderItem.quantity).label("qty"),
-            func.sum(OrderItem.line_total).label("revenue"),
+            func.coalesce(func.sum(OrderItem.quantity), 0).label("qty"),
+            _money_sum(OrderItem.line_total).label("revenue"),
         )
         .join(Order, Order.id == OrderItem.order_id)
         .where(paid_filter)
@@ -47,7 +52,7 @@ def overview(db: Session, start_date: str | None = None, end_date: str | None =
     daily_rows = db.execute(
         select(
             func.date(Order.created_at).label("day"),
-            func.sum(Order.total_amount).label("revenue"),
+            _money_sum(Order.total_amount).label("revenue"),
             func.count(Order.id).label("orders"),
         )
         .where(paid_filter)
@@ -55,27 +60,25 @@ def overview(db: Session, start_date: str | None = None, end_date: str | None =
         .order_by(func.date(Order.created_at)),
     ).all()
 
-    low_stock_rows = db.scalars(
-        select(Ingredient).where(Ingredient.current_stock <= Ingredient.reorder_level).order_by(Ingredient.current_stock),
+    low_stock_rows = db.execute(
+        select(Ingredient.name, Ingredient.current_stock, Ingredient.reorder_level, Ingredient.unit)
+        .where(Ingredient.current_stock <= Ingredient.reorder_level)
+        .order_by(Ingredient.current_stock),
     ).all()
 
     inventory_value = db.scalar(
-        select(func.coalesce(func.sum(Ingredient.current_stock * Ingredient.cost_per_unit), 0.0)),
+        select(_money_sum(Ingredient.current_stock * Ingredient.cost_per_unit)),
     ) or 0.0
 
     return {
         "start_date": start.isoformat(),
         "end_date": end.isoformat(),
-        "total_revenue": round(float(revenue), 2),
-        "total_orders": int(order_count),
-        "average_ticket": round(float(revenue) / order_count, 2) if order_count else 0.0,
-        "inventory_value": round(float(inventory_value), 2),
+        "total_revenue": revenue,
+        "total_orders": order_count,
+        "average_ticket": round(revenue / order_count, 2) if order_count else 0.0,
+        "inventory_value": inventory_value,
         "top_items": [
-            {
-                "menu_item_name": row.menu_item_name,
-                "quantity": int(row.qty or 0),
-                "revenue": round(float(row.revenue or 0), 2),
-            }
+            {"menu_item_name": row.menu_item_name, "quantity": row.qty, "revenue": row.revenue}
             for row in top_rows
         ],
         "low_stock": [
@@ -88,11 +91,7 @@ def overview(db: Session, start_date: str | None = None, end_date: str | None =
             for row in low_stock_rows
         ],
         "daily_sales": [
-            {
-                "day": str(row.day),
-                "revenue": round(float(row.revenue or 0), 2),
-                "orders": int(row.orders or 0),
-            }
+            {"day": str(row.day), "revenue": row.revenue, "orders": row.orders}
             for row in daily_rows
         ],
     }
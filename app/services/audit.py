@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.models import AuditLog, User
@@ -19,14 +20,15 @@ def create_audit_log(
     This helper intentionally does not commit, so callers can control
     transaction boundaries explicitly.
     """
-    row = AuditLog(
-        actor_user_id=actor.id if actor else None,
-        actor_username=actor.username if actor else None,
-        actor_role=actor.role if actor else None,
-        action=action,
-        entity_type=entity_type,
-        entity_id=str(entity_id) if entity_id is not None else None,
-        payload=payload or {},
+    # Audit rows are write-only, so a Core insert skips ORM instance/unit-of-work overhead.
+    db.execute(
+        insert(AuditLog).values(
+            actor_user_id=actor.id if actor else None,
+            actor_username=actor.username if actor else None,
+            actor_role=actor.role if actor else None,
+            action=action,
+            entity_type=entity_type,
+            entity_id=str(entity_id) if entity_id is not None else None,
+            payload=payload or {},
+        ),
     )
-    db.add(row)
-    db.flush()
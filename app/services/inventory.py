@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+import time
+from collections import defaultdict
 from datetime import datetime, timezone
 
 from fastapi import HTTPException
-from sqlalchemy import func, select
+from sqlalchemy import case, insert, select, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.models import Ingredient, MenuItem, Order, RecipeLine, StockMovement
+from app.models import Ingredient, Order, RecipeLine, StockMovement
 from app.schemas import MovementType
 
 EPSILON = 1e-9
+LOW_STOCK_CACHE_KEY = "low_stock_cache"
+RECIPE_CACHE_TTL_SECONDS = 60.0
+RECIPE_CACHE_MAX_ITEMS = 1024
+
+# menu_item_id -> (expires_at, ((ingredient_id, qty per unit), ...)). Recipes change rarely; the
+# replace-recipe endpoint invalidates its entry and the TTL bounds staleness across instances.
+_recipe_cache: dict[int, tuple[float, tuple[tuple[int, float], ...]]] = {}
 
 
 def create_movement(
@@ -21,20 +31,51 @@ def create_movement(
     unit_cost: float | None = None,
     notes: str | None = None,
 ) -> StockMovement:
-    type_value = movement_type.value if isinstance(movement_type, MovementType) else str(movement_type)
     movement = StockMovement(
-        ingredient_id=ingredient.id,
-        movement_type=type_value,
-        quantity=quantity,
-        reference=reference,
-        unit_cost=unit_cost,
-        notes=notes,
+        **_movement_row(
+            ingredient,
+            movement_type,
+            quantity,
+            reference=reference,
+            unit_cost=unit_cost,
+            notes=notes,
+        ),
     )
     db.add(movement)
+    _apply_stock_change(db, ingredient, quantity, unit_cost)
+    return movement
+
+
+def _movement_row(
+    ingredient: Ingredient,
+    movement_type: MovementType | str,
+    quantity: float,
+    *,
+    reference: str | None = None,
+    unit_cost: float | None = None,
+    notes: str | None = None,
+) -> dict:
+    return {
+        "ingredient_id": ingredient.id,
+        "movement_type": movement_type.value if isinstance(movement_type, MovementType) else str(movement_type),
+        "quantity": quantity,
+        "reference": reference,
+        "unit_cost": unit_cost,
+        "notes": notes,
+    }
+
+
+def _apply_stock_change(db: Session, ingredient: Ingredient, quantity: float, unit_cost: float | None = None) -> None:
+    _invalidate_low_stock(db)
     ingredient.current_stock += quantity
     if unit_cost is not None and unit_cost >= 0:
         ingredient.cost_per_unit = unit_cost
-    return movement
+
+
+def _insert_movements(db: Session, rows: list[dict]) -> None:
+    """Write automatic movements in one executemany instead of one ORM insert per ingredient."""
+    if rows:
+        db.execute(insert(StockMovement), rows)
 
 
 def _ensure_non_negative_stock(ingredient: Ingredient, delta: float) -> None:
@@ -49,11 +90,23 @@ def _ensure_non_negative_stock(ingredient: Ingredient, delta: float) -> None:
         )
 
 
+def _invalidate_low_stock(db: Session) -> None:
+    db.info.pop(LOW_STOCK_CACHE_KEY, None)
+
+
 def _get_low_stock_rows(db: Session) -> list[dict]:
-    rows = db.scalars(
-        select(Ingredient).where(Ingredient.current_stock <= Ingredient.reorder_level),
+    # Cached per transaction in db.info; every stock mutation in this module invalidates it.
+    transaction = db.get_transaction()
+    cached = db.info.get(LOW_STOCK_CACHE_KEY)
+    if cached is not None and transaction is not None and cached[0] is transaction:
+        return list(cached[1])
+
+    db.flush()
+    rows = db.execute(
+        select(Ingredient.name, Ingredient.current_stock, Ingredient.reorder_level, Ingredient.unit)
+        .where(Ingredient.current_stock <= Ingredient.reorder_level),
     ).all()
-    return [
+    low_stock = [
         {
             "ingredient_name": row.name,
             "current_stock": round(row.current_stock, 2),
@@ -62,26 +115,86 @@ def _get_low_stock_rows(db: Session) -> list[dict]:
         }
         for row in rows
     ]
+    db.info[LOW_STOCK_CACHE_KEY] = (db.get_transaction(), low_stock)
+    return list(low_stock)
 
 
 def get_low_stock_rows(db: Session) -> list[dict]:
     return _get_low_stock_rows(db)
 
 
-def _collect_requirements_for_lines(db: Session, lines: list[dict[str, int]]) -> dict[int, dict]:
+def clear_recipe_cache(menu_item_id: int | None = None) -> None:
+    """Drop cached recipes for one menu item, or all of them."""
+    if menu_item_id is None:
+        _recipe_cache.clear()
+    else:
+        _recipe_cache.pop(menu_item_id, None)
+
+
+def _cached_recipes(db: Session, menu_item_ids: set[int]) -> dict[int, tuple[tuple[int, float], ...]]:
+    now = time.monotonic()
+    recipes: dict[int, tuple[tuple[int, float], ...]] = {}
+    missing: set[int] = set()
+    for menu_item_id in menu_item_ids:
+        cached = _recipe_cache.get(menu_item_id)
+        if cached is not None and cached[0] > now:
+            recipes[menu_item_id] = cached[1]
+        else:
+            missing.add(menu_item_id)
+    if not missing:
+        return recipes
+
+    loaded: dict[int, list[tuple[int, float]]] = defaultdict(list)
+    for row in db.execute(
+        select(RecipeLine.menu_item_id, RecipeLine.ingredient_id, RecipeLine.quantity)
+        .where(RecipeLine.menu_item_id.in_(missing))
+        .order_by(RecipeLine.id),
+    ):
+        loaded[row.menu_item_id].append((row.ingredient_id, row.quantity))
+
+    if len(_recipe_cache) + len(missing) > RECIPE_CACHE_MAX_ITEMS:
+        _recipe_cache.clear()
+    expires_at = now + RECIPE_CACHE_TTL_SECONDS
+    for menu_item_id in missing:
+        entry = tuple(loaded.get(menu_item_id, ()))
+        _recipe_cache[menu_item_id] = (expires_at, entry)
+        recipes[menu_item_id] = entry
+    return recipes
+
+
+def _fetch_recipe_map(db: Session, menu_item_ids: set[int]) -> dict[int, list[tuple[Ingredient, float]]]:
+    """Map menu_item_id -> [(ingredient, qty per unit)]: cached recipes plus one ingredient query."""
+    if not menu_item_ids:
+        return {}
+
+    # Recipe lines reference menu_items by FK, so missing menu items simply have no recipes.
+    recipes = _cached_recipes(db, menu_item_ids)
+
+    ingredient_ids = {ingredient_id for lines in recipes.values() for ingredient_id, _ in lines}
+    ingredients: dict[int, Ingredient] = {}
+    if ingredient_ids:
+        ingredients = {
+            ingredient.id: ingredient
+            for ingredient in db.scalars(select(Ingredient).where(Ingredient.id.in_(ingredient_ids)))
+        }
+
+    recipe_map: dict[int, list[tuple[Ingredient, float]]] = defaultdict(list)
+    for menu_item_id, lines in recipes.items():
+        for ingredient_id, quantity in lines:
+            ingredient = ingredients.get(ingredient_id)
+            if ingredient:
+                recipe_map[menu_item_id].append((ingredient, quantity))
+    return recipe_map
+
+
+def _requirements_from_recipe_map(
+    recipe_map: dict[int, list[tuple[Ingredient, float]]],
+    lines: list[dict[str, int]],
+) -> dict[int, dict]:
     required_by_ingredient: dict[int, dict] = {}
     for line in lines:
-        menu_item = db.get(MenuItem, line["menu_item_id"])
-        if not menu_item:
-            continue
-        recipe_lines = db.scalars(
-            select(RecipeLine).where(RecipeLine.menu_item_id == menu_item.id),
-        ).all()
-        for recipe in recipe_lines:
-            ingredient = db.get(Ingredient, recipe.ingredient_id)
-            if not ingredient:
-                continue
-            required_qty = recipe.quantity * line["quantity"]
+        for ingredient, quantity in recipe_map.get(line["menu_item_id"], ()):
+            required_qty = quantity * line["quantity"]
             if ingredient.id not in required_by_ingredient:
                 required_by_ingredient[ingredient.id] = {
                     "ingredient": ingredient,
@@ -91,49 +204,91 @@ def _collect_requirements_for_lines(db: Session, lines: list[dict[str, int]]) ->
     return required_by_ingredient
 
 
-def _collect_order_requirements(db: Session, order: Order) -> dict[int, dict]:
-    return _collect_requirements_for_lines(
-        db,
-        [
-            {"menu_item_id": order_item.menu_item_id, "quantity": order_item.quantity}
-            for order_item in order.items
-        ],
-    )
+def _collect_order_requirements(order: Order) -> dict[int, dict]:
+    # Walks order -> items -> menu item -> recipe lines -> ingredient; callers load the order
+    # with fetch_order_with_items(..., with_recipes=True) so this issues no queries.
+    required_by_ingredient: dict[int, dict] = {}
+    for order_item in order.items:
+        for recipe in order_item.menu_item.recipe_lines:
+            ingredient = recipe.ingredient
+            required_qty = recipe.quantity * order_item.quantity
+            if ingredient.id not in required_by_ingredient:
+                required_by_ingredient[ingredient.id] = {
+                    "ingredient": ingredient,
+                    "required_qty": 0.0,
+                }
+            required_by_ingredient[ingredient.id]["required_qty"] += required_qty
+    return required_by_ingredient
 
 
-def _validate_requirements(required_by_ingredient: dict[int, dict]) -> None:
-    shortages: list[dict] = []
-    for row in required_by_ingredient.values():
-        ingredient = row["ingredient"]
-        required_qty = row["required_qty"]
-        if ingredient.current_stock + EPSILON < required_qty:
-            shortages.append(
-                {
-                    "ingredient_name": ingredient.name,
-                    "current_stock": round(ingredient.current_stock, 2),
-                    "required": round(required_qty, 2),
-                    "unit": ingredient.unit,
-                },
-            )
-    if shortages:
-        raise HTTPException(
-            status_code=409,
-            detail={
-                "message": "Insufficient inventory",
-                "shortages": shortages,
-            },
+def _deduct_requirements(db: Session, required_by_ingredient: dict[int, dict]) -> None:
+    """Deduct every requirement with a single conditional ``UPDATE ... RETURNING``.
+
+    The UPDATE takes the row locks and checks availability in the same statement, so there is no
+    separate ``SELECT ... FOR UPDATE`` or refresh; ingredients missing from RETURNING are short.
+    """
+    if not required_by_ingredient:
+        return
+    _invalidate_low_stock(db)
+    required = {ingredient_id: row["required_qty"] for ingredient_id, row in required_by_ingredient.items()}
+    required_qty = case(required, value=Ingredient.id)
+
+    remaining = dict(
+        db.execute(
+            update(Ingredient)
+            .where(Ingredient.id.in_(required), Ingredient.current_stock + EPSILON >= required_qty)
+            .values(current_stock=Ingredient.current_stock - required_qty)
+            .returning(Ingredient.id, Ingredient.current_stock)
+            .execution_options(synchronize_session=False),
+        ).tuples().all(),
+    )
+    if len(remaining) == len(required):
+        for ingredient_id, current_stock in remaining.items():
+            set_committed_value(required_by_ingredient[ingredient_id]["ingredient"], "current_stock", current_stock)
+        return
+
+    # Only shortage rows come back; the caller's rollback undoes the rows that were deducted.
+    short_ids = required.keys() - remaining.keys()
+    shortage_rows = {
+        row.id: row
+        for row in db.execute(
+            select(Ingredient.id, Ingredient.name, Ingredient.current_stock, Ingredient.unit).where(
+                Ingredient.id.in_(short_ids),
+                Ingredient.current_stock + EPSILON < required_qty,
+            ),
         )
+    }
+    raise HTTPException(
+        status_code=409,
+        detail={
+            "message": "Insufficient inventory",
+            "shortages": [
+                {
+                    "ingredient_name": shortage_rows[ingredient_id].name,
+                    "current_stock": round(shortage_rows[ingredient_id].current_stock, 2),
+                    "required": round(required[ingredient_id], 2),
+                    "unit": shortage_rows[ingredient_id].unit,
+                }
+                for ingredient_id in required
+                if ingredient_id in shortage_rows
+            ],
+        },
+    )
 
 
 def _lock_ingredients_for_update(db: Session, ingredient_ids: list[int]) -> None:
+    """Lock (outside SQLite) and reload the given ingredients in one query, refreshing loaded instances."""
     if not ingredient_ids:
         return
+    stmt = (
+        select(Ingredient)
+        .where(Ingredient.id.in_(ingredient_ids))
+        .execution_options(populate_existing=True)
+    )
     bind = db.get_bind()
-    if not bind or bind.dialect.name == "sqlite":
-        return
-    db.execute(
-        select(Ingredient.id).where(Ingredient.id.in_(ingredient_ids)).with_for_update(),
-    ).all()
+    if bind and bind.dialect.name != "sqlite":
+        stmt = stmt.with_for_update()
+    db.scalars(stmt).all()
 
 
 def apply_manual_movement(
@@ -177,22 +332,17 @@ def deduct_inventory_for_order(db: Session, order: Order) -> list[dict]:
     if order.inventory_deducted_at:
         return _get_low_stock_rows(db)
 
-    required_by_ingredient = _collect_order_requirements(db, order)
-    _lock_ingredients_for_update(db, list(required_by_ingredient.keys()))
-    for row in required_by_ingredient.values():
-        db.refresh(row["ingredient"])
-    _validate_requirements(required_by_ingredient)
+    required_by_ingredient = _collect_order_requirements(order)
+    _deduct_requirements(db, required_by_ingredient)
 
+    movement_rows: list[dict] = []
     for row in required_by_ingredient.values():
         ingredient = row["ingredient"]
         required_qty = row["required_qty"]
-        create_movement(
-            db,
-            ingredient=ingredient,
-            movement_type=MovementType.usage.value,
-            quantity=-required_qty,
-            reference=f"ORDER:{order.order_number}",
+        movement_rows.append(
+            _movement_row(ingredient, MovementType.usage, -required_qty, reference=f"ORDER:{order.order_number}"),
         )
+    _insert_movements(db, movement_rows)
 
     order.inventory_deducted_at = datetime.now(timezone.utc)
     return _get_low_stock_rows(db)
@@ -203,24 +353,28 @@ def restore_inventory_for_cancelled_order(db: Session, order: Order) -> list[dic
         return _get_low_stock_rows(db)
 
     restore_reference = f"CANCEL:{order.order_number}"
-    restored_count = db.scalar(
-        select(func.count(StockMovement.id)).where(StockMovement.reference == restore_reference),
-    ) or 0
-    if restored_count > 0:
+    already_restored = db.scalar(
+        select(StockMovement.id).where(StockMovement.reference == restore_reference).limit(1),
+    )
+    if already_restored is not None:
         return _get_low_stock_rows(db)
 
-    required_by_ingredient = _collect_order_requirements(db, order)
+    required_by_ingredient = _collect_order_requirements(order)
+    movement_rows: list[dict] = []
     for row in required_by_ingredient.values():
         ingredient = row["ingredient"]
         required_qty = row["required_qty"]
-        create_movement(
-            db,
-            ingredient=ingredient,
-            movement_type=MovementType.adjustment.value,
-            quantity=required_qty,
-            reference=restore_reference,
-            notes="Auto-restored due to order cancellation",
+        _apply_stock_change(db, ingredient, required_qty)
+        movement_rows.append(
+            _movement_row(
+                ingredient,
+                MovementType.adjustment,
+                required_qty,
+                reference=restore_reference,
+                notes="Auto-restored due to order cancellation",
+            ),
         )
+    _insert_movements(db, movement_rows)
 
     return _get_low_stock_rows(db)
 
@@ -235,8 +389,10 @@ def adjust_inventory_for_amended_order(
     if not order.inventory_deducted_at:
         return _get_low_stock_rows(db)
 
-    previous_requirements = _collect_requirements_for_lines(db, previous_items)
-    next_requirements = _collect_requirements_for_lines(db, next_items)
+    # Most lines survive an amendment, so both sides share one recipe/ingredient fetch.
+    recipe_map = _fetch_recipe_map(db, {line["menu_item_id"] for line in [*previous_items, *next_items]})
+    previous_requirements = _requirements_from_recipe_map(recipe_map, previous_items)
+    next_requirements = _requirements_from_recipe_map(recipe_map, next_items)
 
     ingredient_ids = sorted(set(previous_requirements.keys()) | set(next_requirements.keys()))
     _lock_ingredients_for_update(db, ingredient_ids)
@@ -246,7 +402,6 @@ def adjust_inventory_for_amended_order(
         ingredient = (
             next_requirements.get(ingredient_id, previous_requirements.get(ingredient_id))["ingredient"]
         )
-        db.refresh(ingredient)
         before_required = previous_requirements.get(ingredient_id, {}).get("required_qty", 0.0)
         after_required = next_requirements.get(ingredient_id, {}).get("required_qty", 0.0)
         increased_required = after_required - before_required
@@ -269,6 +424,7 @@ def adjust_inventory_for_amended_order(
             },
         )
 
+    movement_rows: list[dict] = []
     for ingredient_id in ingredient_ids:
         ingredient = (
             next_requirements.get(ingredient_id, previous_requirements.get(ingredient_id))["ingredient"]
@@ -277,22 +433,15 @@ def adjust_inventory_for_amended_order(
         after_required = next_requirements.get(ingredient_id, {}).get("required_qty", 0.0)
         delta = after_required - before_required
         if delta > EPSILON:
-            create_movement(
-                db,
-                ingredient=ingredient,
-                movement_type=MovementType.usage.value,
-                quantity=-delta,
-                reference=f"AMEND:{order.order_number}",
-                notes="Auto-adjusted due to order amendment",
-            )
+            movement_type, notes = MovementType.usage, "Auto-adjusted due to order amendment"
         elif delta < -EPSILON:
-            create_movement(
-                db,
-                ingredient=ingredient,
-                movement_type=MovementType.adjustment.value,
-                quantity=-delta,
-                reference=f"AMEND:{order.order_number}",
-                notes="Auto-restored due to order amendment",
-            )
+            movement_type, notes = MovementType.adjustment, "Auto-restored due to order amendment"
+        else:
+            continue
+        _apply_stock_change(db, ingredient, -delta)
+        movement_rows.append(
+            _movement_row(ingredient, movement_type, -delta, reference=f"AMEND:{order.order_number}", notes=notes),
+        )
+    _insert_movements(db, movement_rows)
 
     return _get_low_stock_rows(db)
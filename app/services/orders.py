@@ -5,11 +5,11 @@ from datetime import datetime, timezone
 from random import randint
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 
-from app.models import ComboRule, MenuItem, Order, OrderItem
+from app.models import ComboRule, MenuItem, Order, OrderItem, RecipeLine, order_number_seq
 from app.schemas import (
     OrderComboCreate,
     OrderAmendRequest,
@@ -47,13 +47,10 @@ def _allocate_weighted_line_totals(
         per_line = round(total_amount / len(weighted_keys), 2)
         allocated = {key: per_line for key, _ in weighted_keys}
     else:
-        allocated: dict[int, float] = {}
-        remaining = round(total_amount, 2)
-        for key, weight in weighted_keys[:-1]:
-            line_total = round(total_amount * (weight / base_sum), 2)
-            allocated[key] = line_total
-            remaining = round(remaining - line_total, 2)
-        allocated[weighted_keys[-1][0]] = remaining
+        scale = total_amount / base_sum
+        allocated = {key: round(weight * scale, 2) for key, weight in weighted_keys[:-1]}
+        # The last line absorbs the rounding remainder so the lines always sum to the total.
+        allocated[weighted_keys[-1][0]] = round(total_amount - sum(allocated.values()), 2)
     return allocated
 
 
@@ -137,6 +134,14 @@ def generate_order_number() -> str:
     return f"OD{timestamp}{randint(1000, 9999)}"
 
 
+def _next_order_number(db: Session) -> str:
+    # A sequence value is unique on the first try; other backends keep the random suffix + retry path.
+    if db.get_bind().dialect.name == "postgresql":
+        seq = db.scalar(select(order_number_seq.next_value()))
+        return f"OD{datetime.now(timezone.utc):%Y%m%d}{seq:08d}"
+    return generate_order_number()
+
+
 def _create_order_with_unique_number(
     db: Session,
     *,
@@ -145,7 +150,7 @@ def _create_order_with_unique_number(
 ) -> Order:
     for _ in range(max_retries):
         row = Order(
-            order_number=generate_order_number(),
+            order_number=_next_order_number(db),
             source=source,
             status=OrderStatus.pending.value,
             payment_status=PaymentStatus.unpaid.value,
@@ -160,10 +165,18 @@ def _create_order_with_unique_number(
     raise HTTPException(status_code=503, detail="Failed to allocate unique order number. Please retry.")
 
 
-def fetch_order_with_items(db: Session, order_id: int) -> Order | None:
+def fetch_order_with_items(db: Session, order_id: int, *, with_recipes: bool = False) -> Order | None:
+    """Load an order with items; ``with_recipes`` also eager-loads recipes and ingredients for inventory."""
+    items_loader = selectinload(Order.items)
+    if with_recipes:
+        items_loader = items_loader.options(
+            joinedload(OrderItem.menu_item)
+            .selectinload(MenuItem.recipe_lines)
+            .joinedload(RecipeLine.ingredient),
+        )
     return db.scalar(
         select(Order)
-        .options(joinedload(Order.items))
+        .options(items_loader)
         .where(Order.id == order_id),
     )
 
@@ -176,6 +189,7 @@ def _normalize_note(note: str | None) -> str | None:
 
 
 def _build_amended_lines(db: Session, payload: OrderAmendRequest) -> list[dict]:
+    quantities: Counter[tuple[int, str | None]] = Counter()
     aggregated: dict[tuple[int, str | None], dict] = {}
 
     for input_item in payload.items:
@@ -185,16 +199,17 @@ def _build_amended_lines(db: Session, payload: OrderAmendRequest) -> list[dict]:
 
         note = _normalize_note(input_item.note)
         key = (menu_item.id, note)
+        quantities[key] += input_item.quantity
         if key not in aggregated:
             aggregated[key] = {
                 "menu_item_id": menu_item.id,
                 "menu_item_name": menu_item.name,
-                "quantity": 0,
                 "unit_price": menu_item.price,
                 "note": note,
             }
-        aggregated[key]["quantity"] += input_item.quantity
 
+    for key, row in aggregated.items():
+        row["quantity"] = quantities[key]
     return sorted(
         aggregated.values(),
         key=lambda row: (row["menu_item_name"], row["menu_item_id"], row["note"] or ""),
@@ -202,17 +217,21 @@ def _build_amended_lines(db: Session, payload: OrderAmendRequest) -> list[dict]:
 
 
 def _snapshot_order_items(items: list[OrderItem]) -> dict[tuple[int, str | None], dict]:
+    quantities: Counter[tuple[int, str | None]] = Counter()
     snapshot: dict[tuple[int, str | None], dict] = {}
     for item in items:
-        key = (item.menu_item_id, _normalize_note(item.note))
+        note = _normalize_note(item.note)
+        key = (item.menu_item_id, note)
+        quantities[key] += item.quantity
         if key not in snapshot:
             snapshot[key] = {
                 "menu_item_id": item.menu_item_id,
                 "menu_item_name": item.menu_item_name,
-                "quantity": 0,
-                "note": _normalize_note(item.note),
+                "note": note,
             }
-        snapshot[key]["quantity"] += item.quantity
+
+    for key, row in snapshot.items():
+        row["quantity"] = quantities[key]
     return snapshot
 
 
@@ -228,78 +247,70 @@ def _snapshot_amended_lines(lines: list[dict]) -> dict[tuple[int, str | None], d
     }
 
 
-def _build_order_diff(before: dict[tuple[int, str | None], dict], after: dict[tuple[int, str | None], dict]) -> OrderDiffOut:
-    added: list[OrderDiffLine] = []
-    removed: list[OrderDiffLine] = []
-    quantity_changed: list[OrderDiffQtyLine] = []
-
-    keys = sorted(
-        set(before.keys()) | set(after.keys()),
-        key=lambda item: (item[0], item[1] or ""),
-    )
-    for key in keys:
-        before_row = before.get(key)
-        after_row = after.get(key)
-        if before_row is None and after_row is not None:
-            added.append(
-                OrderDiffLine(
-                    menu_item_name=after_row["menu_item_name"],
-                    quantity=after_row["quantity"],
-                    note=after_row["note"],
-                ),
-            )
-            continue
-
-        if after_row is None and before_row is not None:
-            removed.append(
-                OrderDiffLine(
-                    menu_item_name=before_row["menu_item_name"],
-                    quantity=before_row["quantity"],
-                    note=before_row["note"],
-                ),
-            )
-            continue
+def _diff_sort_key(key: tuple[int, str | None]) -> tuple[int, str]:
+    return key[0], key[1] or ""
 
-        if before_row and after_row and before_row["quantity"] != after_row["quantity"]:
-            quantity_changed.append(
-                OrderDiffQtyLine(
-                    menu_item_name=after_row["menu_item_name"],
-                    before_quantity=before_row["quantity"],
-                    after_quantity=after_row["quantity"],
-                    note=after_row["note"],
-                ),
-            )
 
+def _build_order_diff(before: dict[tuple[int, str | None], dict], after: dict[tuple[int, str | None], dict]) -> OrderDiffOut:
+    # Set ops on the key views; only the (short) result groups are sorted for stable output.
+    added = [
+        OrderDiffLine(
+            menu_item_name=after[key]["menu_item_name"],
+            quantity=after[key]["quantity"],
+            note=after[key]["note"],
+        )
+        for key in sorted(after.keys() - before.keys(), key=_diff_sort_key)
+    ]
+    removed = [
+        OrderDiffLine(
+            menu_item_name=before[key]["menu_item_name"],
+            quantity=before[key]["quantity"],
+            note=before[key]["note"],
+        )
+        for key in sorted(before.keys() - after.keys(), key=_diff_sort_key)
+    ]
+    quantity_changed = [
+        OrderDiffQtyLine(
+            menu_item_name=after[key]["menu_item_name"],
+            before_quantity=before[key]["quantity"],
+            after_quantity=after[key]["quantity"],
+            note=after[key]["note"],
+        )
+        for key in sorted(before.keys() & after.keys(), key=_diff_sort_key)
+        if before[key]["quantity"] != after[key]["quantity"]
+    ]
     return OrderDiffOut(added=added, removed=removed, quantity_changed=quantity_changed)
 
 
 def _replace_order_items(db: Session, order: Order, lines: list[dict]) -> None:
-    order.items.clear()
-    db.flush()
-
+    rows: list[dict] = []
     total_amount = 0.0
     for line in lines:
         line_total = line["unit_price"] * line["quantity"]
         total_amount += line_total
-        db.add(
-            OrderItem(
-                order_id=order.id,
-                menu_item_id=line["menu_item_id"],
-                menu_item_name=line["menu_item_name"],
-                quantity=line["quantity"],
-                unit_price=line["unit_price"],
-                line_total=line_total,
-                note=line["note"],
-            ),
+        rows.append(
+            {
+                "order_id": order.id,
+                "menu_item_id": line["menu_item_id"],
+                "menu_item_name": line["menu_item_name"],
+                "quantity": line["quantity"],
+                "unit_price": line["unit_price"],
+                "line_total": line_total,
+                "note": line["note"],
+            },
         )
 
+    db.execute(delete(OrderItem).where(OrderItem.order_id == order.id).execution_options(synchronize_session=False))
+    if rows:
+        db.execute(insert(OrderItem), rows)
+    # The loaded collection is stale now; the next access (or eager load) re-reads it.
+    db.expire(order, ["items"])
     order.total_amount = round(total_amount, 2)
-    db.flush()
 
 
 def create_order(db: Session, payload: OrderCreate) -> tuple[Order, list[dict]]:
-    order = _create_order_with_unique_number(db, source=payload.source.value)
-    order.payment_method = payload.payment_method.value
+    order = _create_order_with_unique_number(db, source=payload.source)
+    order.payment_method = payload.payment_method
 
     lines: list[dict] = []
     for input_item in payload.items:
@@ -322,27 +333,14 @@ def create_order(db: Session, payload: OrderCreate) -> tuple[Order, list[dict]]:
     if not lines:
         raise HTTPException(status_code=400, detail="Order must include at least one item or combo")
 
-    total = 0.0
-    for line in lines:
-        total += line["line_total"]
-        db.add(
-            OrderItem(
-                order_id=order.id,
-                menu_item_id=line["menu_item_id"],
-                menu_item_name=line["menu_item_name"],
-                quantity=line["quantity"],
-                unit_price=line["unit_price"],
-                line_total=line["line_total"],
-                note=line["note"],
-            ),
-        )
-
-    order.total_amount = round(total, 2)
-    db.flush()
+    # The order row was already flushed for its id; items go out in one INSERT and the
+    # total rides along with the caller's commit, so no extra flush is needed here.
+    db.execute(insert(OrderItem), [{"order_id": order.id, **line} for line in lines])
+    order.total_amount = round(sum(line["line_total"] for line in lines), 2)
 
     low_stock = []
     if payload.auto_pay:
-        payable_order = fetch_order_with_items(db, order.id) or order
+        payable_order = fetch_order_with_items(db, order.id, with_recipes=True) or order
         low_stock = pay_order(db, payable_order)
 
     refreshed = fetch_order_with_items(db, order.id)
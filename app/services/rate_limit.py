@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import logging
-from collections import defaultdict
+import math
+import random
+from collections import deque
+from collections.abc import Awaitable, Callable
 from time import time
+from typing import TypeVar
 
 from app.config import settings
 
@@ -13,6 +17,23 @@ except Exception:  # pragma: no cover - optional dependency fallback
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+# INCR + first-hit EXPIRE on the current window key in one atomic round trip; also returns
+# the previous window's count so the caller can compute the sliding estimate.
+_INCR_WITH_EXPIRE_LUA = """
+local attempts = redis.call('INCR', KEYS[1])
+if attempts == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+return {attempts, previous}
+"""
+
 
 class LoginRateLimiter:
     """Login limiter with Redis-backed counters and local-memory fallback."""
@@ -23,130 +44,229 @@ class LoginRateLimiter:
         window_seconds: int,
         max_attempts: int,
         redis_url: str = "",
+        redis_max_connections: int = 20,
         redis_error_cooldown_seconds: int = 30,
+        redis_error_max_cooldown_seconds: int = 300,
+        redis_error_threshold: int = 3,
+        redis_success_threshold: int = 1,
     ) -> None:
         self.window_seconds = max(1, int(window_seconds))
         self.max_attempts = max(1, int(max_attempts))
         self.redis_error_cooldown_seconds = max(1, int(redis_error_cooldown_seconds))
-        self._local_attempts: dict[str, list[float]] = defaultdict(list)
-        self._redis_error_until = 0.0
-        self._last_local_cleanup = 0.0
+        self.redis_error_max_cooldown_seconds = max(
+            self.redis_error_cooldown_seconds,
+            int(redis_error_max_cooldown_seconds),
+        )
+        self.redis_error_threshold = max(1, int(redis_error_threshold))
+        self.redis_success_threshold = max(1, int(redis_success_threshold))
+        # identity -> (window bucket, failures in it, failures in the bucket before), the same
+        # windows the Redis keys use.
+        self._local_attempts: dict[str, tuple[int, int, int]] = {}
+        # (bucket end, identity) in insertion order; cleanup only touches identities that are due.
+        self._local_expiry: deque[tuple[float, str]] = deque()
+        # Circuit breaker around Redis: closed -> open after consecutive errors, half-open
+        # after the cooldown lets a single probe through, which re-closes or re-opens it.
+        # Each consecutive trip doubles the cooldown (capped, jittered) so a fleet of workers
+        # does not hit a recovering Redis at the same instant.
+        self._breaker_state = BREAKER_CLOSED
+        self._breaker_trips = 0
+        self._consecutive_failures = 0
+        self._consecutive_successes = 0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        # The Redis client is built on first use so it belongs to the loop that serves requests,
+        # not whichever loop (if any) was current at import time.
+        self._redis_url = redis_url
+        self._redis_max_connections = max(1, int(redis_max_connections))
         self._redis = None
+        self._redis_pool = None
+        self._incr_script = None
 
-        if redis_url:
-            if redis_asyncio is None:
-                logger.warning(
-                    "REDIS_URL is set but redis package is unavailable. Falling back to local memory rate limit.",
-                )
-            else:
-                self._redis = redis_asyncio.from_url(
-                    redis_url,
-                    encoding="utf-8",
-                    decode_responses=True,
-                    socket_connect_timeout=1,
-                    socket_timeout=1,
-                )
+        if redis_url and redis_asyncio is None:
+            logger.warning(
+                "REDIS_URL is set but redis package is unavailable. Falling back to local memory rate limit.",
+            )
 
     async def should_block(self, identity: str) -> bool:
-        if self._redis and time() >= self._redis_error_until:
-            try:
-                return await self._should_block_redis(identity)
-            except Exception as exc:  # pragma: no cover - runtime/network contingency
-                self._redis_error_until = time() + self.redis_error_cooldown_seconds
-                logger.warning(
-                    "Redis rate limit unavailable, fallback to local memory for %ss: %s",
-                    self.redis_error_cooldown_seconds,
-                    exc,
-                )
-        return self._should_block_local(identity)
-
-    async def add_failure(self, identity: str) -> None:
-        if self._redis and time() >= self._redis_error_until:
-            try:
-                await self._add_failure_redis(identity)
-                return
-            except Exception as exc:  # pragma: no cover - runtime/network contingency
-                self._redis_error_until = time() + self.redis_error_cooldown_seconds
-                logger.warning(
-                    "Redis rate limit unavailable, fallback to local memory for %ss: %s",
-                    self.redis_error_cooldown_seconds,
-                    exc,
-                )
-        self._add_failure_local(identity)
+        now = time()
+        ok, blocked = await self._with_breaker(lambda: self._should_block_redis(identity, now), now)
+        if ok:
+            return blocked
+        return self._should_block_local(identity, now)
+
+    async def add_failure(self, identity: str) -> bool:
+        """Record a failed attempt; returns whether the identity is now blocked."""
+        now = time()
+        ok, blocked = await self._with_breaker(lambda: self._add_failure_redis(identity, now), now)
+        if ok:
+            return blocked
+        return self._add_failure_local(identity, now)
 
     async def reset(self, identity: str) -> None:
-        if self._redis and time() >= self._redis_error_until:
-            try:
-                await self._reset_redis(identity)
-            except Exception as exc:  # pragma: no cover - runtime/network contingency
-                self._redis_error_until = time() + self.redis_error_cooldown_seconds
-                logger.warning(
-                    "Redis rate limit reset failed, fallback to local memory cleanup: %s",
-                    exc,
-                )
+        now = time()
+        await self._with_breaker(lambda: self._reset_redis(identity, now), now)
         self._reset_local(identity)
 
     def clear_local(self) -> None:
         self._local_attempts.clear()
+        self._local_expiry.clear()
 
     async def close(self) -> None:
         if self._redis:
             await self._redis.aclose()
+        if self._redis_pool:
+            await self._redis_pool.disconnect()
+        self._redis = None
+        self._redis_pool = None
+        self._incr_script = None
 
-    def _redis_key(self, identity: str) -> str:
-        bucket = int(time() // self.window_seconds)
-        return f"rate_limit:login:{identity}:{bucket}"
+    async def _get_redis(self) -> redis_asyncio.Redis | None:
+        if self._redis is None and self._redis_url and redis_asyncio is not None:
+            # Bounded, shared pool: login bursts reuse sockets instead of opening new ones.
+            self._redis_pool = redis_asyncio.ConnectionPool.from_url(
+                self._redis_url,
+                max_connections=self._redis_max_connections,
+                encoding="utf-8",
+                decode_responses=True,
+                socket_connect_timeout=1,
+                socket_timeout=1,
+                health_check_interval=30,
+            )
+            self._redis = redis_asyncio.Redis(connection_pool=self._redis_pool)
+            self._incr_script = self._redis.register_script(_INCR_WITH_EXPIRE_LUA)
+        return self._redis
 
-    async def _should_block_redis(self, identity: str) -> bool:
-        key = self._redis_key(identity)
-        count = await self._redis.get(key)
-        return int(count or 0) >= self.max_attempts
+    async def _with_breaker(self, operation: Callable[[], Awaitable[T]], now: float) -> tuple[bool, T | None]:
+        """Run a Redis operation through the breaker; ``(False, None)`` means use local memory."""
+        if not await self._get_redis():
+            return False, None
 
-    async def _add_failure_redis(self, identity: str) -> None:
-        key = self._redis_key(identity)
-        attempts = await self._redis.incr(key)
-        if attempts == 1:
-            await self._redis.expire(key, self.window_seconds + 5)
+        if self._breaker_state == BREAKER_OPEN:
+            if now < self._open_until:
+                return False, None
+            self._breaker_state = BREAKER_HALF_OPEN
+            self._consecutive_successes = 0
+        is_probe = self._breaker_state == BREAKER_HALF_OPEN
+        if is_probe:
+            if self._probe_in_flight:
+                return False, None
+            self._probe_in_flight = True
 
-    async def _reset_redis(self, identity: str) -> None:
-        key = self._redis_key(identity)
-        await self._redis.delete(key)
+        try:
+            result = await operation()
+        except Exception as exc:  # pragma: no cover - runtime/network contingency
+            self._record_redis_failure(exc)
+            return False, None
+        finally:
+            if is_probe:
+                self._probe_in_flight = False
+        self._record_redis_success()
+        return True, result
 
-    def _should_block_local(self, identity: str) -> bool:
-        now = time()
-        self._local_maybe_cleanup(now)
-        attempts = self._prune_local_identity(identity, now)
-        return len(attempts) >= self.max_attempts
+    def _record_redis_success(self) -> None:
+        self._consecutive_failures = 0
+        if self._breaker_state == BREAKER_HALF_OPEN:
+            self._consecutive_successes += 1
+            if self._consecutive_successes >= self.redis_success_threshold:
+                self._breaker_state = BREAKER_CLOSED
+                self._breaker_trips = 0
+                logger.info("Redis rate limit recovered, leaving local memory fallback.")
 
-    def _add_failure_local(self, identity: str) -> None:
-        now = time()
-        self._local_maybe_cleanup(now)
-        attempts = self._prune_local_identity(identity, now)
-        attempts.append(now)
-        self._local_attempts[identity] = attempts
+    def _record_redis_failure(self, exc: Exception) -> None:
+        self._consecutive_failures += 1
+        # Calls already in flight when the breaker opened must not re-trip it (and stretch the cooldown).
+        if self._breaker_state != BREAKER_OPEN and (
+            self._breaker_state == BREAKER_HALF_OPEN or self._consecutive_failures >= self.redis_error_threshold
+        ):
+            cooldown = self._next_cooldown()
+            self._breaker_state = BREAKER_OPEN
+            self._breaker_trips += 1
+            self._open_until = time() + cooldown
+            logger.warning(
+                "Redis rate limit unavailable, fallback to local memory for %.1fs: %s",
+                cooldown,
+                exc,
+            )
+        else:
+            logger.warning("Redis rate limit call failed, using local memory for this call: %s", exc)
+
+    def _next_cooldown(self) -> float:
+        backoff = self.redis_error_cooldown_seconds * 2 ** min(self._breaker_trips, 16)
+        return min(self.redis_error_max_cooldown_seconds, backoff * random.uniform(0.5, 1.5))
+
+    def _is_over_limit(self, current: int, previous: int, now: float) -> bool:
+        """Sliding-window estimate: the previous window counts by the share still overlapping.
+
+        The weighted share is rounded up so a burst straddling the boundary is never under-counted.
+        """
+        window = self.window_seconds
+        weight = 1.0 - (now % window) / window
+        return math.ceil(previous * weight) + current >= self.max_attempts
+
+    def _redis_keys(self, identity: str, now: float) -> list[str]:
+        bucket = int(now // self.window_seconds)
+        return [f"rate_limit:login:{identity}:{bucket}", f"rate_limit:login:{identity}:{bucket - 1}"]
+
+    async def _should_block_redis(self, identity: str, now: float) -> bool:
+        current, previous = await self._redis.mget(self._redis_keys(identity, now))
+        return self._is_over_limit(int(current or 0), int(previous or 0), now)
+
+    async def _add_failure_redis(self, identity: str, now: float) -> bool:
+        # Keys outlive their own window so they can still serve as the previous one.
+        current, previous = await self._incr_script(
+            keys=self._redis_keys(identity, now),
+            args=[2 * self.window_seconds + 5],
+        )
+        return self._is_over_limit(int(current), int(previous), now)
+
+    async def _reset_redis(self, identity: str, now: float) -> None:
+        await self._redis.delete(*self._redis_keys(identity, now))
+
+    def _local_counts(self, identity: str, current_bucket: int) -> tuple[int, int]:
+        bucket, count, previous = self._local_attempts.get(identity, (current_bucket, 0, 0))
+        if bucket == current_bucket:
+            return count, previous
+        if bucket == current_bucket - 1:
+            return 0, count
+        return 0, 0
+
+    def _should_block_local(self, identity: str, now: float) -> bool:
+        current_bucket = int(now // self.window_seconds)
+        self._local_maybe_cleanup(now, current_bucket)
+        count, previous = self._local_counts(identity, current_bucket)
+        return self._is_over_limit(count, previous, now)
+
+    def _add_failure_local(self, identity: str, now: float) -> bool:
+        # No await between the read and the tuple store, so on the event loop this update is
+        # atomic per identity without a lock; a global lock would only serialize other users.
+        window = self.window_seconds
+        current_bucket = int(now // window)
+        self._local_maybe_cleanup(now, current_bucket)
+        count, previous = self._local_counts(identity, current_bucket)
+        if count == 0:
+            # Keep the entry through the next window, where it serves as the previous count.
+            self._local_expiry.append(((current_bucket + 2) * window, identity))
+        self._local_attempts[identity] = (current_bucket, count + 1, previous)
+        return self._is_over_limit(count + 1, previous, now)
 
     def _reset_local(self, identity: str) -> None:
         self._local_attempts.pop(identity, None)
 
-    def _prune_local_identity(self, identity: str, now: float) -> list[float]:
-        attempts = self._local_attempts.get(identity, [])
-        attempts = [ts for ts in attempts if now - ts < self.window_seconds]
-        if attempts:
-            self._local_attempts[identity] = attempts
-        else:
-            self._local_attempts.pop(identity, None)
-        return attempts
-
-    def _local_maybe_cleanup(self, now: float) -> None:
-        if now - self._last_local_cleanup < self.window_seconds:
-            return
-        self._last_local_cleanup = now
-        for identity in list(self._local_attempts.keys()):
-            self._prune_local_identity(identity, now)
+    def _local_maybe_cleanup(self, now: float, current_bucket: int) -> None:
+        expiry = self._local_expiry
+        while expiry and expiry[0][0] <= now:
+            _, identity = expiry.popleft()
+            entry = self._local_attempts.get(identity)
+            if entry is not None and entry[0] < current_bucket - 1:
+                del self._local_attempts[identity]
 
 
 login_rate_limiter = LoginRateLimiter(
     window_seconds=settings.login_rate_window_seconds,
     max_attempts=settings.login_rate_max_attempts,
     redis_url=settings.redis_url,
+    redis_max_connections=settings.redis_pool_size,
+    redis_error_cooldown_seconds=settings.redis_error_cooldown_seconds,
+    redis_error_max_cooldown_seconds=settings.redis_error_max_cooldown_seconds,
+    redis_error_threshold=settings.redis_error_threshold,
 )
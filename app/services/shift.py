@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime, timezone
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import and_, case, func, or_, select
 from sqlalchemy.orm import Session
 
 from app.models import Order, ShiftSession, User
@@ -37,34 +37,51 @@ def open_shift(db: Session, *, payload: ShiftOpenRequest, actor: User) -> ShiftS
     return row
 
 
+def _lock_open_shift(db: Session) -> ShiftSession | None:
+    # SKIP LOCKED: a second close attempt sees no row instead of queueing behind the first.
+    return db.scalar(
+        select(ShiftSession)
+        .where(ShiftSession.status == "open")
+        .order_by(ShiftSession.opened_at.desc())
+        .limit(1)
+        .with_for_update(skip_locked=True),
+    )
+
+
 def close_shift(db: Session, *, payload: ShiftCloseRequest, actor: User) -> ShiftSession:
-    row = get_open_shift(db)
+    row = _lock_open_shift(db)
     if not row:
+        if get_open_shift(db):
+            raise HTTPException(status_code=409, detail="Shift is already being closed")
         raise HTTPException(status_code=409, detail="No open shift to close")
 
     now = datetime.now(timezone.utc)
-    paid_orders = db.scalars(
-        select(Order)
-        .where(Order.paid_at.is_not(None))
-        .where(Order.paid_at >= row.opened_at)
-        .where(Order.paid_at <= now)
-        .where(Order.payment_status == "paid"),
-    ).all()
-
-    refunded_orders = db.scalars(
-        select(Order)
-        .where(Order.updated_at >= row.opened_at)
-        .where(Order.updated_at <= now)
-        .where(Order.payment_status == "refunded"),
-    ).all()
-
-    total_revenue = round(sum(order.total_amount for order in paid_orders), 2)
-    cash_revenue = round(
-        sum(order.total_amount for order in paid_orders if order.payment_method == "cash"),
-        2,
+    is_paid = and_(
+        Order.payment_status == "paid",
+        Order.paid_at.is_not(None),
+        Order.paid_at.between(row.opened_at, now),
     )
+    is_refunded = and_(
+        Order.payment_status == "refunded",
+        Order.updated_at.between(row.opened_at, now),
+    )
+    # Shift totals come back as a single aggregate row; no Order rows are loaded.
+    paid_total, cash_total, paid_order_count, refund_total = db.execute(
+        select(
+            func.coalesce(func.sum(case((is_paid, Order.total_amount), else_=0.0)), 0.0),
+            func.coalesce(
+                func.sum(case((and_(is_paid, Order.payment_method == "cash"), Order.total_amount), else_=0.0)),
+                0.0,
+            ),
+            func.count(case((is_paid, Order.id))),
+            func.coalesce(func.sum(case((is_refunded, Order.total_amount), else_=0.0)), 0.0),
+        ).where(or_(is_paid, is_refunded)),
+    ).one()
+
+    total_revenue = round(paid_total, 2)
+    cash_revenue = round(cash_total, 2)
     non_cash_revenue = round(total_revenue - cash_revenue, 2)
-    refund_amount = round(sum(order.total_amount for order in refunded_orders), 2)
+    refund_amount = round(refund_total, 2)
     expected_cash = round(row.opening_cash + cash_revenue, 2)
     actual_cash = round(payload.actual_cash, 2)
     cash_difference = round(actual_cash - expected_cash, 2)
@@ -73,7 +90,7 @@ def close_shift(db: Session, *, payload: ShiftCloseRequest, actor: User) -> Shif
     row.expected_cash = expected_cash
     row.actual_cash = actual_cash
     row.cash_difference = cash_difference
-    row.paid_order_count = len(paid_orders)
+    row.paid_order_count = paid_order_count
     row.total_revenue = total_revenue
     row.cash_revenue = cash_revenue
     row.non_cash_revenue = non_cash_revenue
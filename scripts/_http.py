@@ -0,0 +1,65 @@
+"""HTTP plumbing shared by the import scripts: keep-alive connections and a bounded worker pool."""
+from __future__ import annotations
+
+import gzip
+import http.client
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, TypeVar
+from urllib import parse
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Concurrent write requests per sync phase; each worker thread keeps its own connection.
+MAX_WORKERS = 16
+
+# One keep-alive connection per (thread, host) instead of a new socket per request.
+_connections: dict[tuple[int, str, str], http.client.HTTPConnection] = {}
+
+
+def request(
+    method: str,
+    url: str,
+    headers: dict[str, str],
+    body: bytes | None,
+    timeout: int = 30,
+) -> tuple[int, http.client.HTTPMessage, bytes]:
+    """Send one request on this thread's pooled connection; gzip response bodies are decoded."""
+    parts = parse.urlsplit(url)
+    key = (threading.get_ident(), parts.scheme, parts.netloc)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    for attempt in range(2):
+        conn = _connections.get(key)
+        if conn is None:
+            conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+            conn = _connections[key] = conn_cls(parts.netloc, timeout=timeout)
+        try:
+            conn.request(method, target, body=body, headers=headers)
+            resp = conn.getresponse()
+            raw = resp.read()
+            if resp.getheader("Content-Encoding", "").lower() == "gzip":
+                raw = gzip.decompress(raw)
+            return resp.status, resp.headers, raw
+        except (http.client.HTTPException, ConnectionError):
+            # The server may drop an idle keep-alive socket; reconnect once.
+            conn.close()
+            _connections.pop(key, None)
+            if attempt:
+                raise
+    raise RuntimeError("unreachable")
+
+
+def close_connections() -> None:
+    for conn in list(_connections.values()):
+        conn.close()
+    _connections.clear()
+
+
+def run_parallel(func: Callable[[T], R], jobs: Iterable[T]) -> list[R]:
+    """Run independent API calls on a bounded thread pool; results keep job order."""
+    jobs = list(jobs)
+    if len(jobs) <= 1:
+        return [func(job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(jobs))) as pool:
+        return list(pool.map(func, jobs))
@@ -12,12 +12,12 @@ import argparse
 import json
 import re
 import sys
-import urllib.request
-import urllib.error
-import urllib.parse
 from pathlib import Path
 
 import openpyxl
+import orjson
+
+from _http import close_connections, request, run_parallel
 
 # ---------------------------------------------------------------------------
 # Config
@@ -60,13 +60,17 @@ SKIP_CATEGORIES = {"60元套餐", "95元套餐", "點心代號說明"}
 # Base veggies columns (5-9) — shared by all items in a category
 BASE_VEGGIE_COLS = [5, 6, 7, 8, 9]
 
+# "雞蛋(1個)" -> ("雞蛋", "1"); "[PASTA] 青醬" -> ("PASTA", "青醬")
+_QTY_RE = re.compile(r"^(.+?)\((\d+)[^)]*\)$")
+_TAG_RE = re.compile(r"^\[([A-Z_]+)\]\s*(.+)$")
+
 
 # ---------------------------------------------------------------------------
 # Excel parsing
 # ---------------------------------------------------------------------------
 def parse_quantity_from_text(text: str) -> tuple[str, float]:
     """Extract ingredient name and quantity from text like '雞蛋(1個)' or '蘿蔔糕(2片)'."""
-    m = re.match(r"^(.+?)\((\d+)[^)]*\)$", text)
+    m = _QTY_RE.match(text)
     if m:
         return m.group(1), float(m.group(2))
     return text, 1.0
@@ -74,79 +78,79 @@ def parse_quantity_from_text(text: str) -> tuple[str, float]:
 
 def parse_excel(xlsx_path: str) -> dict:
     """Parse the Excel file and return structured data."""
-    wb = openpyxl.load_workbook(xlsx_path)
-    ws = wb["主食系列"]
-
-    rows = []
-    for row in ws.iter_rows(min_row=1, values_only=True):
-        vals = [str(cell) if cell is not None else "" for cell in row]
-        rows.append(vals)
-
-    # Skip header row
-    data_rows = rows[1:]
-
-    # --- Pass 1: collect all raw items with category ---
-    raw_items = []
-    current_category = ""
-    base_veggies: list[str] = []  # shared veggies for current category
-
-    for vals in data_rows:
-        category = vals[0].strip()
-        item_name = vals[1].strip()
-        price_str = vals[2].strip()
-        price_l_str = vals[3].strip() if len(vals) > 3 else ""
-
-        if not item_name:
-            continue
-        if category:
-            current_category = category
-
-        if current_category in SKIP_CATEGORIES:
-            continue
-
-        # Parse price
-        price_m = float(price_str) if price_str and price_str.replace(".", "").isdigit() else 0
-        price_l = float(price_l_str) if price_l_str and price_l_str.replace(".", "").isdigit() else 0
-
-        # Check if this row defines base veggies (first item in category)
-        row_veggies = [vals[c].strip() for c in BASE_VEGGIE_COLS if c < len(vals) and vals[c].strip()]
-        if category and row_veggies:
-            base_veggies = row_veggies
-        elif category and not row_veggies:
-            # New category without base veggies
-            base_veggies = []
-
-        # Collect ingredient columns (10-13)
-        item_ingredients = []
-        for c in range(10, min(14, len(vals))):
-            ing = vals[c].strip()
-            if ing:
-                item_ingredients.append(ing)
-
-        raw_items.append({
-            "category": current_category,
-            "raw_name": item_name,
-            "price_m": price_m,
-            "price_l": price_l,
-            "base_veggies": list(base_veggies),
-            "ingredients": item_ingredients,
-        })
+    # Read-only mode streams rows from the sheet XML instead of building the whole workbook.
+    wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
+    try:
+        ws = wb["主食系列"]
+
+        # --- Pass 1: items, right-side ingredient list and side options in one scan ---
+        raw_items = []
+        ingredient_list = []
+        side_options = []
+        current_category = ""
+        base_veggies: list[str] = []  # shared veggies for current category
+
+        # Skip header row
+        for row in ws.iter_rows(min_row=2, values_only=True):
+            vals = [str(cell) if cell is not None else "" for cell in row]
+            if len(vals) < 3:
+                vals.extend([""] * (3 - len(vals)))
+
+            # Ingredient list from right-side columns (18-19)
+            if len(vals) > 18:
+                ing_name = vals[18].strip()
+                ing_unit = vals[19].strip() if len(vals) > 19 else ""
+                if ing_name and ing_name != "品項" and ing_unit and ing_unit != "單位":
+                    ingredient_list.append({"name": ing_name, "unit": ing_unit})
+
+            category = vals[0].strip()
+            item_name = vals[1].strip()
+            price_str = vals[2].strip()
+            price_l_str = vals[3].strip() if len(vals) > 3 else ""
+
+            # Side option codes for combo rules
+            if category == "點心代號說明" and item_name and price_str:
+                side_options.append({"code": item_name, "name": price_str})
+
+            if not item_name:
+                continue
+            if category:
+                current_category = category
 
-    # --- Pass 2: collect ingredient list from right-side columns (18-19) ---
-    ingredient_list = []
-    for vals in data_rows:
-        if len(vals) > 19:
-            ing_name = vals[18].strip()
-            ing_unit = vals[19].strip()
-        elif len(vals) > 18:
-            ing_name = vals[18].strip()
-            ing_unit = ""
-        else:
-            continue
-        if ing_name and ing_name != "品項" and ing_unit and ing_unit != "單位":
-            ingredient_list.append({"name": ing_name, "unit": ing_unit})
+            if current_category in SKIP_CATEGORIES:
+                continue
 
-    # --- Pass 3: detect duplicate names and build final menu items ---
+            # Parse price
+            price_m = float(price_str) if price_str and price_str.replace(".", "").isdigit() else 0
+            price_l = float(price_l_str) if price_l_str and price_l_str.replace(".", "").isdigit() else 0
+
+            # Check if this row defines base veggies (first item in category)
+            row_veggies = [vals[c].strip() for c in BASE_VEGGIE_COLS if c < len(vals) and vals[c].strip()]
+            if category and row_veggies:
+                base_veggies = row_veggies
+            elif category and not row_veggies:
+                # New category without base veggies
+                base_veggies = []
+
+            # Collect ingredient columns (10-13)
+            item_ingredients = []
+            for c in range(10, min(14, len(vals))):
+                ing = vals[c].strip()
+                if ing:
+                    item_ingredients.append(ing)
+
+            raw_items.append({
+                "category": current_category,
+                "raw_name": item_name,
+                "price_m": price_m,
+                "price_l": price_l,
+                "base_veggies": list(base_veggies),
+                "ingredients": item_ingredients,
+            })
+    finally:
+        wb.close()
+
+    # --- Pass 2: detect duplicate names and build final menu items ---
     name_counts: dict[str, list[str]] = {}
     for item in raw_items:
         name_counts.setdefault(item["raw_name"], []).append(item["category"])
@@ -188,17 +192,8 @@ def parse_excel(xlsx_path: str) -> dict:
             if all_ings:
                 recipes[name] = all_ings
 
-    # --- Pass 4: collect combo rules ---
+    # --- Pass 3: build combo rules from the side options collected above ---
     combo_rules = []
-    side_options = []
-
-    for vals in data_rows:
-        cat = vals[0].strip()
-        if cat == "點心代號說明":
-            code = vals[1].strip()
-            desc = vals[2].strip()
-            if code and desc:
-                side_options.append({"code": code, "name": desc})
 
     # Find eligible drinks (price <= 35)
     eligible_drinks = [
@@ -239,34 +234,24 @@ def parse_excel(xlsx_path: str) -> dict:
 # ---------------------------------------------------------------------------
 def api_call(method: str, url: str, token: str, data: dict | list | None = None) -> dict | list | None:
     body = json.dumps(data).encode() if data is not None else None
-    req = urllib.request.Request(
+    status, _, raw = request(
+        method,
         url,
-        data=body,
-        method=method,
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        },
+        {"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+        body,
     )
-    try:
-        with urllib.request.urlopen(req) as resp:
-            return json.loads(resp.read().decode())
-    except urllib.error.HTTPError as e:
-        body_text = e.read().decode() if e.fp else ""
-        print(f"  !! HTTP {e.code}: {body_text}")
+    if status >= 400:
+        print(f"  !! HTTP {status}: {raw.decode()}")
         return None
+    return json.loads(raw.decode())
 
 
 def login(base_url: str, username: str, password: str) -> str:
     data = json.dumps({"username": username, "password": password}).encode()
-    req = urllib.request.Request(
-        f"{base_url}/api/auth/login",
-        data=data,
-        method="POST",
-        headers={"Content-Type": "application/json"},
-    )
-    with urllib.request.urlopen(req) as resp:
-        return json.loads(resp.read().decode())["access_token"]
+    status, _, raw = request("POST", f"{base_url}/api/auth/login", {"Content-Type": "application/json"}, data)
+    if status >= 400:
+        raise SystemExit(f"Login failed: HTTP {status}: {raw.decode()}")
+    return json.loads(raw.decode())["access_token"]
 
 
 # ---------------------------------------------------------------------------
@@ -274,7 +259,7 @@ def login(base_url: str, username: str, password: str) -> str:
 # ---------------------------------------------------------------------------
 def _strip_tag(name: str) -> str:
     """Remove [TAG] prefix from a name for fuzzy matching."""
-    m = re.match(r"^\[([A-Z_]+)\]\s*(.+)$", name)
+    m = _TAG_RE.match(name)
     return m.group(2) if m else name
 
 
@@ -294,6 +279,7 @@ def sync_menu_items(base_url: str, token: str, items: list[dict], dry_run: bool)
 
     name_to_id: dict[str, int] = {}
     matched_ids: set[int] = set()
+    upserts: list[dict] = []
     created = updated = renamed = skipped = 0
 
     for item in items:
@@ -325,10 +311,7 @@ def sync_menu_items(base_url: str, token: str, items: list[dict], dry_run: bool)
             if changes:
                 action = "RENAME+UPDATE" if "name" in changes else "UPDATE"
                 print(f"  {action}: {ex['name']} -> {name} ${item['price']}")
-                if not dry_run:
-                    result = api_call("PUT", f"{base_url}/api/menu/items/{ex['id']}", token, changes)
-                    if result:
-                        name_to_id[name] = result["id"]
+                upserts.append({"id": ex["id"], **item})
                 if "name" in changes:
                     renamed += 1
                 else:
@@ -338,10 +321,7 @@ def sync_menu_items(base_url: str, token: str, items: list[dict], dry_run: bool)
                 name_to_id[name] = ex["id"]
         else:
             print(f"  CREATE: {name} ${item['price']}")
-            if not dry_run:
-                result = api_call("POST", f"{base_url}/api/menu/items", token, item)
-                if result:
-                    name_to_id[name] = result["id"]
+            upserts.append(dict(item))
             created += 1
 
     # Deactivate old items not in the new list
@@ -350,10 +330,15 @@ def sync_menu_items(base_url: str, token: str, items: list[dict], dry_run: bool)
         if ex["id"] not in matched_ids and ex["id"] not in name_to_id.values():
             if ex["is_active"]:
                 print(f"  DEACTIVATE: {ex['name']}")
-                if not dry_run:
-                    api_call("PUT", f"{base_url}/api/menu/items/{ex['id']}", token, {"is_active": False})
+                upserts.append({"id": ex["id"], "name": ex["name"], "price": ex["price"], "is_active": False})
                 deactivated += 1
 
+    # All creates, updates, renames and deactivations go to the server in one request.
+    if upserts and not dry_run:
+        result = api_call("POST", f"{base_url}/api/menu/items/bulk-upsert", token, {"items": upserts}) or []
+        wanted = {item["name"] for item in items}
+        name_to_id.update({row["name"]: row["id"] for row in result if row["name"] in wanted})
+
     print(f"  菜單: {created} 新增, {renamed} 改名, {updated} 更新, {skipped} 不變, {deactivated} 停用")
     return name_to_id
 
@@ -364,24 +349,31 @@ def sync_ingredients(base_url: str, token: str, ingredients: list[dict], dry_run
     existing_map = {ing["name"]: ing for ing in existing}
     name_to_id = {ing["name"]: ing["id"] for ing in existing}
 
-    created = skipped = 0
+    to_create: list[dict] = []
+    skipped = 0
     for ing in ingredients:
         name = ing["name"]
         if name in existing_map:
             skipped += 1
         else:
             print(f"  CREATE: {name} ({ing['unit']})")
-            if not dry_run:
-                result = api_call("POST", f"{base_url}/api/inventory/ingredients", token, {
-                    "name": name,
-                    "unit": ing["unit"],
-                    "current_stock": 0,
-                    "reorder_level": 10,
-                    "cost_per_unit": 0,
-                })
-                if result:
-                    name_to_id[name] = result["id"]
-            created += 1
+            to_create.append({
+                "name": name,
+                "unit": ing["unit"],
+                "current_stock": 0,
+                "reorder_level": 10,
+                "cost_per_unit": 0,
+            })
+    created = len(to_create)
+
+    if to_create and not dry_run:
+        results = run_parallel(
+            lambda body: api_call("POST", f"{base_url}/api/inventory/ingredients", token, body),
+            to_create,
+        )
+        for body, result in zip(to_create, results):
+            if result:
+                name_to_id[body["name"]] = result["id"]
 
     print(f"  食材: {created} 新增, {skipped} 已存在")
     return name_to_id
@@ -396,7 +388,8 @@ def sync_recipes(
     dry_run: bool,
 ) -> None:
     """Set recipe lines for each menu item."""
-    set_count = skip_count = 0
+    jobs: list[tuple[int, list[dict]]] = []
+    skip_count = 0
 
     for menu_name, ing_texts in recipes.items():
         menu_id = menu_id_map.get(menu_name)
@@ -415,9 +408,14 @@ def sync_recipes(
             continue
 
         print(f"  RECIPE: {menu_name} → {len(lines)} 種食材")
-        if not dry_run:
-            api_call("PUT", f"{base_url}/api/menu/items/{menu_id}/recipe", token, lines)
-        set_count += 1
+        jobs.append((menu_id, lines))
+    set_count = len(jobs)
+
+    if jobs and not dry_run:
+        run_parallel(
+            lambda job: api_call("PUT", f"{base_url}/api/menu/items/{job[0]}/recipe", token, job[1]),
+            jobs,
+        )
 
     print(f"  配方: {set_count} 設定, {skip_count} 跳過(無匹配食材)")
 
@@ -492,30 +490,33 @@ def main():
     # Save generated payload for reference
     payload_path = Path(args.file).parent / "imports" / "menu_from_excel.json"
     payload_path.parent.mkdir(exist_ok=True)
-    with open(payload_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # orjson writes UTF-8 directly (no \u escapes) and in one write call.
+    payload_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
     print(f"[>] 已儲存解析結果: {payload_path}\n")
 
-    # Login
-    print("[*] 登入中...")
-    token = login(args.base_url, args.username, args.password)
-    print("    登入成功\n")
-
-    # Phase 1: Menu items
-    print("[1/4] 同步菜單品項")
-    menu_id_map = sync_menu_items(args.base_url, token, data["menu_items"], args.dry_run)
-
-    # Phase 2: Ingredients
-    print("\n[2/4] 同步食材")
-    ing_id_map = sync_ingredients(args.base_url, token, data["ingredient_list"], args.dry_run)
-
-    # Phase 3: Recipes
-    print("\n[3/4] 設定配方")
-    sync_recipes(args.base_url, token, data["recipes"], menu_id_map, ing_id_map, args.dry_run)
-
-    # Phase 4: Combos
-    print("\n[4/4] 同步套餐規則")
-    sync_combos(args.base_url, token, data["combo_rules"], menu_id_map, args.dry_run)
+    try:
+        # Login
+        print("[*] 登入中...")
+        token = login(args.base_url, args.username, args.password)
+        print("    登入成功\n")
+
+        # Phase 1: Menu items
+        print("[1/4] 同步菜單品項")
+        menu_id_map = sync_menu_items(args.base_url, token, data["menu_items"], args.dry_run)
+
+        # Phase 2: Ingredients
+        print("\n[2/4] 同步食材")
+        ing_id_map = sync_ingredients(args.base_url, token, data["ingredient_list"], args.dry_run)
+
+        # Phase 3: Recipes
+        print("\n[3/4] 設定配方")
+        sync_recipes(args.base_url, token, data["recipes"], menu_id_map, ing_id_map, args.dry_run)
+
+        # Phase 4: Combos
+        print("\n[4/4] 同步套餐規則")
+        sync_combos(args.base_url, token, data["combo_rules"], menu_id_map, args.dry_run)
+    finally:
+        close_connections()
 
     print("\n[OK] 匯入完成!")
 
@@ -1,17 +1,69 @@
 from __future__ import annotations
 
 import argparse
-import json
+import gzip
+import hashlib
 import sys
-from collections import Counter
 from pathlib import Path
-from urllib import error, request
+
+import orjson
+from pydantic import BeforeValidator, Field, StrictBool, StringConstraints, TypeAdapter, ValidationError
+from typing_extensions import Annotated, NotRequired, TypedDict
+
+from _http import close_connections, request, run_parallel
 
 
 class ApiError(RuntimeError):
     pass
 
 
+def _as_text(value: object) -> object:
+    # Same coercion as _clean_name: numeric names such as 123 are accepted as "123".
+    return value if type(value) is str else str(value or "")
+
+
+class _MenuItemRow(TypedDict):
+    name: Annotated[str, BeforeValidator(_as_text), StringConstraints(strip_whitespace=True, min_length=1)]
+    price: Annotated[float, Field(gt=0)]
+    is_active: NotRequired[StrictBool | None]
+
+
+class _PayloadShape(TypedDict):
+    menu_items: Annotated[list[_MenuItemRow], Field(min_length=1)]
+    combo_rules: NotRequired[list[dict] | None]
+
+
+# Compiled once into a pydantic-core validator that checks the whole payload structure in one
+# pass before any cleaning starts; combo semantics are still checked per rule below.
+_PAYLOAD_VALIDATOR = TypeAdapter(_PayloadShape)
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    first = exc.errors()[0]
+    loc = first["loc"]
+    if not loc:
+        return f"payload: {first['msg']}"
+    text = str(loc[0])
+    for part in loc[1:]:
+        text += f"[{part + 1}]" if isinstance(part, int) else f".{part}"
+    return f"{text}: {first['msg']}"
+
+
+def _fingerprint(state: dict) -> bytes:
+    """Stable 16-byte digest of a normalized state dict (key order does not matter)."""
+    return hashlib.blake2b(orjson.dumps(state, option=orjson.OPT_SORT_KEYS), digest_size=16).digest()
+
+
+# Request bodies at least this large are gzip-compressed when --gzip is on.
+GZIP_MIN_BYTES = 1024
+# Set from --gzip; the server (or a proxy in front of it) must accept gzip request bodies.
+_gzip_request_bodies = False
+
+# Set from --use-cache; GET responses are cached here and revalidated with If-None-Match.
+_get_cache_dir: Path | None = None
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "import_menu_api"
+
+
 def _full_url(base_url: str, path: str) -> str:
     return f"{base_url.rstrip('/')}{path}"
 
@@ -24,32 +76,78 @@ def _api_json(
     token: str | None = None,
     payload: dict | list | None = None,
 ):
-    headers = {"Accept": "application/json"}
+    headers = {"Accept": "application/json", "Accept-Encoding": "gzip"}
     data = None
     if payload is not None:
-        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        data = orjson.dumps(payload)
         headers["Content-Type"] = "application/json"
+        if _gzip_request_bodies and len(data) >= GZIP_MIN_BYTES:
+            # Level 1 is nearly free next to a network round trip and still shrinks JSON several-fold.
+            data = gzip.compress(data, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
     if token:
         headers["Authorization"] = f"Bearer {token}"
 
-    req = request.Request(_full_url(base_url, path), data=data, headers=headers, method=method)
     try:
-        with request.urlopen(req, timeout=timeout) as resp:
-            body = resp.read().decode("utf-8")
-            if not body:
-                return None
-            return json.loads(body)
-    except error.HTTPError as exc:
-        raw = exc.read().decode("utf-8", errors="replace")
-        detail = raw
+        status, _, body = request(method, _full_url(base_url, path), headers, data, timeout)
+    except OSError as exc:
+        raise ApiError(f"{method} {path} failed: {exc}") from exc
+
+    _raise_for_status(method, path, status, body)
+    if not body:
+        return None
+    return orjson.loads(body)
+
+
+def _raise_for_status(method: str, path: str, status: int, body: bytes) -> None:
+    if status < 400:
+        return
+    detail = body.decode("utf-8", errors="replace")
+    try:
+        parsed = orjson.loads(body)
+        detail = parsed.get("detail", parsed)
+    except orjson.JSONDecodeError:
+        pass
+    raise ApiError(f"{method} {path} failed ({status}): {detail}")
+
+
+def _get_json(base_url: str, path: str, timeout: int, token: str):
+    """GET that revalidates a local copy with If-None-Match when --use-cache is on.
+
+    A 304 means the server-side list is unchanged, so its body is never re-sent or re-parsed
+    from the wire; any cache read/write problem just falls back to a plain GET.
+    """
+    if _get_cache_dir is None:
+        return _api_json("GET", base_url, path, timeout=timeout, token=token)
+
+    url = _full_url(base_url, path)
+    cache_file = _get_cache_dir / f"{hashlib.blake2b(url.encode('utf-8'), digest_size=16).hexdigest()}.json"
+    cached = None
+    try:
+        cached = orjson.loads(cache_file.read_bytes())
+    except (OSError, ValueError):
+        pass
+
+    headers = {"Accept": "application/json", "Accept-Encoding": "gzip", "Authorization": f"Bearer {token}"}
+    if isinstance(cached, dict) and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    try:
+        status, resp_headers, body = request("GET", url, headers, None, timeout)
+    except OSError as exc:
+        raise ApiError(f"GET {path} failed: {exc}") from exc
+
+    if status == 304 and isinstance(cached, dict):
+        return cached.get("data")
+    _raise_for_status("GET", path, status, body)
+    data = orjson.loads(body)
+    etag = resp_headers.get("ETag")
+    if etag:
         try:
-            parsed = json.loads(raw)
-            detail = parsed.get("detail", parsed)
-        except json.JSONDecodeError:
+            _get_cache_dir.mkdir(parents=True, exist_ok=True)
+            cache_file.write_bytes(orjson.dumps({"etag": etag, "data": data}))
+        except OSError:
             pass
-        raise ApiError(f"{method} {path} failed ({exc.code}): {detail}") from exc
-    except error.URLError as exc:
-        raise ApiError(f"{method} {path} failed: {exc.reason}") from exc
+    return data
 
 
 def _as_bool(value: object, *, default: bool = True) -> bool:
@@ -61,10 +159,13 @@ def _as_bool(value: object, *, default: bool = True) -> bool:
 
 
 def _as_int(value: object, *, field: str, min_value: int = 0, max_value: int = 100) -> int:
-    try:
-        parsed = int(value)
-    except (TypeError, ValueError) as exc:
-        raise ValueError(f"{field} must be integer, got {value!r}") from exc
+    if type(value) is int:
+        parsed = value
+    else:
+        try:
+            parsed = int(value)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"{field} must be integer, got {value!r}") from exc
     if parsed < min_value or parsed > max_value:
         raise ValueError(f"{field} must be in [{min_value}, {max_value}], got {parsed}")
     return parsed
@@ -73,17 +174,28 @@ def _as_int(value: object, *, field: str, min_value: int = 0, max_value: int = 1
 def _as_price(value: object, *, field: str, allow_none: bool = False) -> float | None:
     if value is None and allow_none:
         return None
-    try:
+    # JSON numbers arrive as float/int; only other types need the generic conversion.
+    value_type = type(value)
+    if value_type is float:
+        parsed = value
+    elif value_type is int:
         parsed = float(value)
-    except (TypeError, ValueError) as exc:
-        raise ValueError(f"{field} must be numeric, got {value!r}") from exc
+    else:
+        try:
+            parsed = float(value)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"{field} must be numeric, got {value!r}") from exc
     if parsed <= 0:
         raise ValueError(f"{field} must be > 0, got {parsed}")
     return round(parsed, 2)
 
 
 def _clean_name(value: object, *, field: str) -> str:
-    text = str(value or "").strip()
+    # JSON strings are the common case: strip them directly instead of via str(value or "").
+    if type(value) is str:
+        text = value.strip()
+    else:
+        text = str(value or "").strip()
     if not text:
         raise ValueError(f"{field} is required")
     return text
@@ -100,7 +212,9 @@ def _clean_side_options(raw_options: object, *, combo_code: str) -> list[dict]:
     for idx, option in enumerate(raw_options, start=1):
         if not isinstance(option, dict):
             raise ValueError(f"combo_rules[{combo_code}].side_options[{idx}] must be object")
-        code = _clean_name(option.get("code"), field=f"combo_rules[{combo_code}].side_options[{idx}].code").upper()
+        code = sys.intern(
+            _clean_name(option.get("code"), field=f"combo_rules[{combo_code}].side_options[{idx}].code").upper()
+        )
         name = _clean_name(option.get("name"), field=f"combo_rules[{combo_code}].side_options[{idx}].name")
         if code in seen_codes:
             raise ValueError(f"combo_rules[{combo_code}] duplicate side option code: {code}")
@@ -115,111 +229,107 @@ def _clean_eligible_drink_names(raw_names: object, *, combo_code: str) -> list[s
     if not isinstance(raw_names, list):
         raise ValueError(f"combo_rules[{combo_code}].drink_rule.eligible_drinks must be list")
     clean_names: list[str] = []
+    seen_names: set[str] = set()
     for idx, raw_name in enumerate(raw_names, start=1):
         name = _clean_name(raw_name, field=f"combo_rules[{combo_code}].drink_rule.eligible_drinks[{idx}]")
+        if name in seen_names:
+            raise ValueError(f"combo_rules[{combo_code}] duplicate eligible drink name: {name}")
+        seen_names.add(name)
         clean_names.append(name)
-    duplicates = [name for name, count in Counter(clean_names).items() if count > 1]
-    if duplicates:
-        raise ValueError(f"combo_rules[{combo_code}] duplicate eligible drink names: {sorted(duplicates)}")
     return clean_names
 
 
+def _clean_menu_item(row: _MenuItemRow, seen_names: set[str]) -> dict:
+    name = row["name"]
+    if name in seen_names:
+        raise ValueError(f"duplicate menu item name in payload: {name}")
+    seen_names.add(name)
+    is_active = row.get("is_active")
+    return {
+        "name": name,
+        "price": round(row["price"], 2),
+        "is_active": True if is_active is None else is_active,
+    }
+
+
+def _clean_combo_rule(idx: int, raw_combo: dict, seen_combo_codes: set[str]) -> dict:
+    # Interned so existing_by_code lookups against the server's codes compare by identity.
+    code = sys.intern(_clean_name(raw_combo.get("code"), field=f"combo_rules[{idx}].code").upper())
+    if code in seen_combo_codes:
+        raise ValueError(f"duplicate combo code in payload: {code}")
+    seen_combo_codes.add(code)
+    name = _clean_name(raw_combo.get("name"), field=f"combo_rules[{idx}].name")
+    bundle_price = _as_price(raw_combo.get("bundle_price"), field=f"combo_rules[{idx}].bundle_price")
+    is_active = _as_bool(raw_combo.get("is_active"), default=True)
+    raw_rule_text = raw_combo.get("raw_rule_text")
+    raw_rule_text = str(raw_rule_text).strip() if raw_rule_text else None
+
+    drink_rule = raw_combo.get("drink_rule") or {}
+    if not isinstance(drink_rule, dict):
+        raise ValueError(f"combo_rules[{idx}].drink_rule must be object")
+    max_drink_price = drink_rule.get("max_price", raw_combo.get("max_drink_price"))
+    if max_drink_price is not None and str(max_drink_price).strip() == "":
+        max_drink_price = None
+    max_drink_price = _as_price(max_drink_price, field=f"combo_rules[{idx}].drink_rule.max_price", allow_none=True)
+    drink_choice_count = _as_int(
+        drink_rule.get("choice_count", raw_combo.get("drink_choice_count", 1)),
+        field=f"combo_rules[{idx}].drink_rule.choice_count",
+        min_value=0,
+        max_value=20,
+    )
+    eligible_drink_names = _clean_eligible_drink_names(drink_rule.get("eligible_drinks"), combo_code=code)
+
+    side_rule = raw_combo.get("side_rule") or {}
+    if not isinstance(side_rule, dict):
+        raise ValueError(f"combo_rules[{idx}].side_rule must be object")
+    side_choice_count = _as_int(
+        side_rule.get("choice_count", raw_combo.get("side_choice_count", 0)),
+        field=f"combo_rules[{idx}].side_rule.choice_count",
+        min_value=0,
+        max_value=20,
+    )
+    side_options = _clean_side_options(side_rule.get("options", raw_combo.get("side_options")), combo_code=code)
+
+    if eligible_drink_names and drink_choice_count > len(eligible_drink_names):
+        raise ValueError(
+            f"combo_rules[{code}] drink_choice_count cannot exceed eligible_drinks length"
+        )
+    if side_options and side_choice_count > len(side_options):
+        raise ValueError(
+            f"combo_rules[{code}] side_choice_count cannot exceed side_options length"
+        )
+
+    return {
+        "code": code,
+        "name": name,
+        "bundle_price": bundle_price,
+        "max_drink_price": max_drink_price,
+        "drink_choice_count": drink_choice_count,
+        "side_choice_count": side_choice_count,
+        "eligible_drink_names": eligible_drink_names,
+        "side_options": side_options,
+        "raw_rule_text": raw_rule_text,
+        "is_active": is_active,
+    }
+
+
 def load_payload(path: Path) -> tuple[list[dict], list[dict]]:
     if not path.exists():
         raise FileNotFoundError(f"payload file not found: {path}")
 
-    data = json.loads(path.read_text(encoding="utf-8"))
-    raw_items = data.get("menu_items")
-    if not isinstance(raw_items, list) or not raw_items:
-        raise ValueError("payload.menu_items must be a non-empty list")
+    try:
+        data = _PAYLOAD_VALIDATOR.validate_python(orjson.loads(path.read_bytes()))
+    except ValidationError as exc:
+        raise ValueError(_format_validation_error(exc)) from None
 
-    clean_items: list[dict] = []
     seen_names: set[str] = set()
-    for idx, row in enumerate(raw_items, start=1):
-        if not isinstance(row, dict):
-            raise ValueError(f"menu_items[{idx}] must be object")
-        name = _clean_name(row.get("name"), field=f"menu_items[{idx}].name")
-        if name in seen_names:
-            raise ValueError(f"duplicate menu item name in payload: {name}")
-        seen_names.add(name)
-        clean_items.append(
-            {
-                "name": name,
-                "price": _as_price(row.get("price"), field=f"menu_items[{idx}].price"),
-                "is_active": _as_bool(row.get("is_active"), default=True),
-            }
-        )
-
-    raw_combo_rules = data.get("combo_rules", [])
-    if raw_combo_rules is None:
-        raw_combo_rules = []
-    if not isinstance(raw_combo_rules, list):
-        raise ValueError("payload.combo_rules must be list when present")
+    clean_items = [_clean_menu_item(row, seen_names) for row in data["menu_items"]]
 
-    clean_combo_rules: list[dict] = []
+    raw_combo_rules = data.get("combo_rules") or []
     seen_combo_codes: set[str] = set()
-    for idx, raw_combo in enumerate(raw_combo_rules, start=1):
-        if not isinstance(raw_combo, dict):
-            raise ValueError(f"combo_rules[{idx}] must be object")
-        code = _clean_name(raw_combo.get("code"), field=f"combo_rules[{idx}].code").upper()
-        if code in seen_combo_codes:
-            raise ValueError(f"duplicate combo code in payload: {code}")
-        seen_combo_codes.add(code)
-        name = _clean_name(raw_combo.get("name"), field=f"combo_rules[{idx}].name")
-        bundle_price = _as_price(raw_combo.get("bundle_price"), field=f"combo_rules[{idx}].bundle_price")
-        is_active = _as_bool(raw_combo.get("is_active"), default=True)
-        raw_rule_text = raw_combo.get("raw_rule_text")
-        raw_rule_text = str(raw_rule_text).strip() if raw_rule_text else None
-
-        drink_rule = raw_combo.get("drink_rule") or {}
-        if not isinstance(drink_rule, dict):
-            raise ValueError(f"combo_rules[{idx}].drink_rule must be object")
-        max_drink_price = drink_rule.get("max_price", raw_combo.get("max_drink_price"))
-        if max_drink_price is not None and str(max_drink_price).strip() == "":
-            max_drink_price = None
-        max_drink_price = _as_price(max_drink_price, field=f"combo_rules[{idx}].drink_rule.max_price", allow_none=True)
-        drink_choice_count = _as_int(
-            drink_rule.get("choice_count", raw_combo.get("drink_choice_count", 1)),
-            field=f"combo_rules[{idx}].drink_rule.choice_count",
-            min_value=0,
-            max_value=20,
-        )
-        eligible_drink_names = _clean_eligible_drink_names(drink_rule.get("eligible_drinks"), combo_code=code)
-
-        side_rule = raw_combo.get("side_rule") or {}
-        if not isinstance(side_rule, dict):
-            raise ValueError(f"combo_rules[{idx}].side_rule must be object")
-        side_choice_count = _as_int(
-            side_rule.get("choice_count", raw_combo.get("side_choice_count", 0)),
-            field=f"combo_rules[{idx}].side_rule.choice_count",
-            min_value=0,
-            max_value=20,
-        )
-        side_options = _clean_side_options(side_rule.get("options", raw_combo.get("side_options")), combo_code=code)
-
-        if eligible_drink_names and drink_choice_count > len(eligible_drink_names):
-            raise ValueError(
-                f"combo_rules[{code}] drink_choice_count cannot exceed eligible_drinks length"
-            )
-        if side_options and side_choice_count > len(side_options):
-            raise ValueError(
-                f"combo_rules[{code}] side_choice_count cannot exceed side_options length"
-            )
-
-        clean_combo_rules.append(
-            {
-                "code": code,
-                "name": name,
-                "bundle_price": bundle_price,
-                "max_drink_price": max_drink_price,
-                "drink_choice_count": drink_choice_count,
-                "side_choice_count": side_choice_count,
-                "eligible_drink_names": eligible_drink_names,
-                "side_options": side_options,
-                "raw_rule_text": raw_rule_text,
-                "is_active": is_active,
-            }
-        )
+    clean_combo_rules = [
+        _clean_combo_rule(idx, raw_combo, seen_combo_codes) for idx, raw_combo in enumerate(raw_combo_rules, start=1)
+    ]
 
     return clean_items, clean_combo_rules
 
@@ -233,13 +343,7 @@ def login(base_url: str, username: str, password: str, timeout: int) -> str:
 
 
 def fetch_existing_menu(base_url: str, token: str, timeout: int) -> dict[str, dict]:
-    rows = _api_json(
-        "GET",
-        base_url,
-        "/api/menu/items?active_only=false",
-        timeout=timeout,
-        token=token,
-    )
+    rows = _get_json(base_url, "/api/menu/items?active_only=false", timeout, token)
     if not isinstance(rows, list):
         raise ApiError("GET /api/menu/items returned invalid payload")
     mapped: dict[str, dict] = {}
@@ -254,20 +358,14 @@ def fetch_existing_menu(base_url: str, token: str, timeout: int) -> dict[str, di
 
 
 def fetch_existing_combos(base_url: str, token: str, timeout: int) -> dict[str, dict]:
-    rows = _api_json(
-        "GET",
-        base_url,
-        "/api/menu/combos?active_only=false",
-        timeout=timeout,
-        token=token,
-    )
+    rows = _get_json(base_url, "/api/menu/combos?active_only=false", timeout, token)
     if not isinstance(rows, list):
         raise ApiError("GET /api/menu/combos returned invalid payload")
     mapped: dict[str, dict] = {}
     for row in rows:
         if not isinstance(row, dict):
             continue
-        code = str(row.get("code", "")).strip().upper()
+        code = sys.intern(str(row.get("code", "")).strip().upper())
         if not code:
             continue
         mapped[code] = row
@@ -280,60 +378,120 @@ def sync_menu_items(
     timeout: int,
     menu_items: list[dict],
     dry_run: bool,
-) -> dict[str, int]:
+    bulk: bool = False,
+) -> tuple[dict[str, int], dict[str, dict]]:
+    """Sync menu items; returns the stats and the post-sync name -> row map."""
     existing = fetch_existing_menu(base_url, token, timeout)
     stats = {"created": 0, "updated": 0, "unchanged": 0}
+    creates: list[dict] = []
+    updates: list[tuple[str, int, dict[str, object]]] = []
 
     for item in menu_items:
         current = existing.get(item["name"])
         if current is None:
             if dry_run:
                 print(f"[DRY-RUN] CREATE menu item {item['name']} @ {item['price']}")
-            else:
-                created = _api_json("POST", base_url, "/api/menu/items", timeout=timeout, token=token, payload=item)
-                if isinstance(created, dict):
-                    existing[item["name"]] = created
+            creates.append(item)
             stats["created"] += 1
             continue
 
+        price_changed = round(float(current.get("price", 0)), 2) != item["price"]
+        active_changed = bool(current.get("is_active", True)) != item["is_active"]
+        if not price_changed and not active_changed:
+            stats["unchanged"] += 1
+            continue
+
         update_payload: dict[str, object] = {}
-        current_price = round(float(current.get("price", 0)), 2)
-        if current_price != item["price"]:
+        if price_changed:
             update_payload["price"] = item["price"]
-
-        current_active = bool(current.get("is_active", True))
-        if current_active != item["is_active"]:
+        if active_changed:
             update_payload["is_active"] = item["is_active"]
+        if dry_run:
+            print(f"[DRY-RUN] UPDATE menu item {item['name']} -> {update_payload}")
+        updates.append((item["name"], int(current["id"]), update_payload))
+        stats["updated"] += 1
 
-        if update_payload:
-            if dry_run:
-                print(f"[DRY-RUN] UPDATE menu item {item['name']} -> {update_payload}")
-            else:
-                item_id = int(current["id"])
-                updated = _api_json(
-                    "PUT",
-                    base_url,
-                    f"/api/menu/items/{item_id}",
-                    timeout=timeout,
-                    token=token,
-                    payload=update_payload,
-                )
-                if isinstance(updated, dict):
-                    existing[item["name"]] = updated
-            stats["updated"] += 1
-        else:
-            stats["unchanged"] += 1
+    if dry_run:
+        # Placeholder ids let combo resolution see items that would have been created.
+        for placeholder_id, item in enumerate(creates, start=1):
+            existing[item["name"]] = {"id": -placeholder_id, **item}
+        return stats, existing
 
-    return stats
+    if bulk:
+        _bulk_upsert_items(base_url, token, timeout, creates, updates, existing)
+        return stats, existing
+
+    # Items are independent, so the writes fan out; `existing` is only touched on this thread.
+    created_rows = run_parallel(
+        lambda item: _api_json("POST", base_url, "/api/menu/items", timeout=timeout, token=token, payload=item),
+        creates,
+    )
+    for item, created in zip(creates, created_rows):
+        if isinstance(created, dict):
+            existing[item["name"]] = created
+
+    updated_rows = run_parallel(
+        lambda job: _api_json(
+            "PUT",
+            base_url,
+            f"/api/menu/items/{job[1]}",
+            timeout=timeout,
+            token=token,
+            payload=job[2],
+        ),
+        updates,
+    )
+    for (name, _, _), updated in zip(updates, updated_rows):
+        if isinstance(updated, dict):
+            existing[name] = updated
 
+    return stats, existing
 
-def _build_combo_payload(combo: dict, menu_by_name: dict[str, dict]) -> dict:
-    missing_drinks = sorted([name for name in combo["eligible_drink_names"] if name not in menu_by_name])
+
+def _bulk_upsert_items(
+    base_url: str,
+    token: str,
+    timeout: int,
+    creates: list[dict],
+    updates: list[tuple[str, int, dict[str, object]]],
+    existing: dict[str, dict],
+) -> None:
+    """Send every create and update in one request to the bulk-upsert endpoint."""
+    lines: list[dict] = [dict(item) for item in creates]
+    for name, item_id, patch in updates:
+        current = existing[name]
+        lines.append(
+            {
+                "id": item_id,
+                "name": name,
+                "price": patch.get("price", current.get("price")),
+                "is_active": patch.get("is_active", current.get("is_active", True)),
+            }
+        )
+    if not lines:
+        return
+    rows = _api_json(
+        "POST",
+        base_url,
+        "/api/menu/items/bulk-upsert",
+        timeout=timeout,
+        token=token,
+        payload={"items": lines},
+    )
+    if not isinstance(rows, list):
+        raise ApiError("POST /api/menu/items/bulk-upsert returned invalid payload")
+    for row in rows:
+        if isinstance(row, dict) and row.get("name"):
+            existing[str(row["name"])] = row
+
+
+def _build_combo_payload(combo: dict, menu_id_by_name: dict[str, int]) -> dict:
+    missing_drinks = sorted(set(combo["eligible_drink_names"]) - menu_id_by_name.keys())
     if missing_drinks:
         raise ApiError(
             f"Combo {combo['code']} references unknown eligible drinks: {missing_drinks}"
         )
-    eligible_drink_item_ids = [int(menu_by_name[name]["id"]) for name in combo["eligible_drink_names"]]
+    eligible_drink_item_ids = [menu_id_by_name[name] for name in combo["eligible_drink_names"]]
     return {
         "code": combo["code"],
         "name": combo["name"],
@@ -401,49 +559,58 @@ def sync_combo_rules(
 ) -> dict[str, int]:
     stats = {"created": 0, "updated": 0, "unchanged": 0}
     existing_by_code = fetch_existing_combos(base_url, token, timeout)
+    menu_id_by_name = {name: int(row["id"]) for name, row in menu_by_name.items() if "id" in row}
+    creates: list[tuple[str, dict]] = []
+    updates: list[tuple[str, int, dict]] = []
 
     for combo in combo_rules:
-        desired_payload = _build_combo_payload(combo, menu_by_name)
+        desired_payload = _build_combo_payload(combo, menu_id_by_name)
         existing = existing_by_code.get(combo["code"])
         if existing is None:
             if dry_run:
                 print(f"[DRY-RUN] CREATE combo {combo['code']} ({combo['name']})")
-            else:
-                created = _api_json(
-                    "POST",
-                    base_url,
-                    "/api/menu/combos",
-                    timeout=timeout,
-                    token=token,
-                    payload=desired_payload,
-                )
-                if isinstance(created, dict):
-                    existing_by_code[combo["code"]] = created
+            creates.append((combo["code"], desired_payload))
             stats["created"] += 1
             continue
 
-        current_state = _normalize_combo_state(existing)
-        desired_state = _normalize_combo_payload(desired_payload)
-        if current_state == desired_state:
+        current_fp = _fingerprint(_normalize_combo_state(existing))
+        desired_fp = _fingerprint(_normalize_combo_payload(desired_payload))
+        if current_fp == desired_fp:
             stats["unchanged"] += 1
             continue
 
         combo_id = int(existing["id"])
         if dry_run:
             print(f"[DRY-RUN] UPDATE combo {combo['code']} -> /api/menu/combos/{combo_id}")
-        else:
-            updated = _api_json(
-                "PUT",
-                base_url,
-                f"/api/menu/combos/{combo_id}",
-                timeout=timeout,
-                token=token,
-                payload=desired_payload,
-            )
-            if isinstance(updated, dict):
-                existing_by_code[combo["code"]] = updated
+        updates.append((combo["code"], combo_id, desired_payload))
         stats["updated"] += 1
 
+    if dry_run:
+        return stats
+
+    created_rows = run_parallel(
+        lambda job: _api_json("POST", base_url, "/api/menu/combos", timeout=timeout, token=token, payload=job[1]),
+        creates,
+    )
+    for (code, _), created in zip(creates, created_rows):
+        if isinstance(created, dict):
+            existing_by_code[code] = created
+
+    updated_rows = run_parallel(
+        lambda job: _api_json(
+            "PUT",
+            base_url,
+            f"/api/menu/combos/{job[1]}",
+            timeout=timeout,
+            token=token,
+            payload=job[2],
+        ),
+        updates,
+    )
+    for (code, _, _), updated in zip(updates, updated_rows):
+        if isinstance(updated, dict):
+            existing_by_code[code] = updated
+
     return stats
 
 
@@ -463,18 +630,43 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--password", default="manager1234", help="Login password.")
     parser.add_argument("--timeout", type=int, default=10, help="HTTP timeout in seconds.")
     parser.add_argument("--dry-run", action="store_true", help="Print actions without writing data.")
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Gzip large request bodies (server or proxy must accept Content-Encoding: gzip).",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Send all menu item changes in one bulk-upsert request (server must support it).",
+    )
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help=f"Cache GET responses under {DEFAULT_CACHE_DIR} and revalidate them with ETags.",
+    )
     return parser.parse_args()
 
 
 def main() -> int:
+    global _gzip_request_bodies, _get_cache_dir
+
     args = parse_args()
+    _gzip_request_bodies = args.gzip
+    _get_cache_dir = DEFAULT_CACHE_DIR if args.use_cache else None
     payload_file = Path(args.file)
 
     try:
         menu_items, combo_rules = load_payload(payload_file)
         token = login(args.base_url, args.username, args.password, args.timeout)
-        menu_stats = sync_menu_items(args.base_url, token, args.timeout, menu_items, args.dry_run)
-        menu_by_name = fetch_existing_menu(args.base_url, token, args.timeout)
+        menu_stats, menu_by_name = sync_menu_items(
+            args.base_url,
+            token,
+            args.timeout,
+            menu_items,
+            args.dry_run,
+            bulk=args.bulk,
+        )
         combo_stats = sync_combo_rules(
             args.base_url,
             token,
@@ -486,6 +678,8 @@ def main() -> int:
     except (ApiError, FileNotFoundError, ValueError) as exc:
         print(f"[ERROR] {exc}")
         return 1
+    finally:
+        close_connections()
 
     print("=== Import Summary ===")
     print(f"source_file: {payload_file}")
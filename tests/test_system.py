@@ -1,47 +1,186 @@
+import asyncio
 import os
 from pathlib import Path
 import sys
+from time import time
 
-os.environ["DATABASE_URL"] = "sqlite:///./test_breakfast.db"
+os.environ["DATABASE_URL"] = "sqlite+pysqlite:///:memory:"
 os.environ["APP_ENV"] = "test"
 os.environ["SECRET_KEY"] = "test-secret-key"
 sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "scripts"))
 
+import orjson
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 
+from app.config import settings
 from app.database import Base, SessionLocal, engine
 from app.main import app, clear_rate_limits
-from app.seed import seed_database
+from app.services.inventory import clear_recipe_cache
+from app.services.rate_limit import LoginRateLimiter
+from import_menu_api import load_payload
+
+# Bound by the module-scoped _app_client fixture before any test or helper uses it.
+client: TestClient | None = None
+# Seeded users survive every per-test rollback, so one login per account serves the module.
+_tokens: dict[tuple[str, str], str] = {}
+# Per-test lookups of seeded rows by name; cleared in setup_function.
+_menu_items_by_name: dict[str, dict] = {}
+_ingredients_by_name: dict[str, dict] = {}
+_test_connection = None
+_test_transaction = None
+
+
+@event.listens_for(engine, "connect")
+def _configure_sqlite_connection(dbapi_connection, _connection_record) -> None:
+    # pysqlite's own BEGIN handling breaks SAVEPOINTs; let SQLAlchemy emit BEGIN itself.
+    dbapi_connection.isolation_level = None
+    # The test database is disposable: skip fsync and keep journal/temp data in memory.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+@event.listens_for(engine, "begin")
+def _emit_begin(conn) -> None:
+    conn.exec_driver_sql("BEGIN")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _app_client():
+    """One client for the module: the app lifespan (which seeds the database) and its portal run once."""
+    global client
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as test_client:
+        client = test_client
+        yield test_client
+    _tokens.clear()
+    Base.metadata.drop_all(bind=engine)
+
 
-client = TestClient(app)
+@pytest.fixture
+def ctx() -> dict:
+    """Headers and seeded menu for the combo tests.
+
+    Function-scoped so its logins and reads run after setup_function, inside the test's rolled-back
+    transaction; cached tokens and the per-test menu lookup keep it cheap.
+    """
+    get_menu_item("Milk Tea")
+    return {
+        "staff": auth_headers("staff1", "staff1234"),
+        "manager": auth_headers("manager1", "manager1234"),
+        "menu": _menu_items_by_name,
+    }
 
 
 def reset_db() -> None:
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-    with SessionLocal() as db:
-        seed_database(db)
+    """Run the test inside an outer transaction; app commits only release SAVEPOINTs."""
+    global _test_connection, _test_transaction
+    clear_recipe_cache()
+    _test_connection = engine.connect()
+    _test_transaction = _test_connection.begin()
+    SessionLocal.configure(bind=_test_connection, join_transaction_mode="create_savepoint")
 
 
-def find_item(rows: list[dict], key: str, value: str) -> dict:
-    for row in rows:
-        if row[key] == value:
-            return row
-    raise AssertionError(f"Cannot find row where {key}={value}")
+def rollback_db() -> None:
+    global _test_connection, _test_transaction
+    _test_transaction.rollback()
+    _test_connection.close()
+    _test_connection = _test_transaction = None
+    SessionLocal.configure(bind=engine)
 
 
-def auth_headers(username: str, password: str) -> dict[str, str]:
+def index_by(rows: list[dict], key: str) -> dict[str, dict]:
+    return {row[key]: row for row in rows}
+
+
+def login(username: str, password: str) -> str:
     res = client.post("/api/auth/login", json={"username": username, "password": password})
     assert res.status_code == 200
-    token = res.json()["access_token"]
+    return res.json()["access_token"]
+
+
+def auth_headers(username: str, password: str) -> dict[str, str]:
+    token = _tokens.get((username, password))
+    if token is None:
+        token = _tokens[(username, password)] = login(username, password)
     return {"Authorization": f"Bearer {token}"}
 
 
+def get_menu_item(name: str) -> dict:
+    if not _menu_items_by_name:
+        rows = client.get("/api/menu/items", headers=auth_headers("staff1", "staff1234")).json()
+        _menu_items_by_name.update(index_by(rows, "name"))
+    return _menu_items_by_name[name]
+
+
+def get_ingredient(name: str) -> dict:
+    """Ingredient row as first read in this test; re-fetch when the current stock matters."""
+    if not _ingredients_by_name:
+        rows = client.get("/api/inventory/ingredients", headers=auth_headers("manager1", "manager1234")).json()
+        _ingredients_by_name.update(index_by(rows, "name"))
+    return _ingredients_by_name[name]
+
+
+def stock_of(*names: str) -> dict[str, float]:
+    res = client.get(
+        "/api/inventory/ingredients",
+        headers=auth_headers("manager1", "manager1234"),
+        params={"names": list(names)},
+    )
+    assert res.status_code == 200
+    stock = {row["name"]: row["current_stock"] for row in res.json()}
+    assert stock.keys() == set(names)
+    return stock
+
+
+def post_order(
+    headers: dict[str, str],
+    *items: tuple[str, int],
+    auto_pay: bool = True,
+    source: str = "takeout",
+    payment_method: str | None = None,
+):
+    """POST /api/orders for (menu item name, quantity) pairs, encoded once with orjson."""
+    payload = {
+        "source": source,
+        "auto_pay": auto_pay,
+        "items": [{"menu_item_id": get_menu_item(name)["id"], "quantity": quantity} for name, quantity in items],
+    }
+    if payment_method is not None:
+        payload["payment_method"] = payment_method
+    return client.post(
+        "/api/orders",
+        headers={**headers, "Content-Type": "application/json"},
+        content=orjson.dumps(payload),
+    )
+
+
+def exhaust_login(username: str, password: str, cap: int = 20):
+    """Fail logins until the limiter answers 429; returns (failures before the block, 429 response)."""
+    for failures in range(cap):
+        res = client.post("/api/auth/login", json={"username": username, "password": password})
+        if res.status_code == 429:
+            return failures, res
+        assert res.status_code == 401
+    raise AssertionError(f"login rate limit never triggered within {cap} attempts")
+
+
 def setup_function() -> None:
     clear_rate_limits()
+    _menu_items_by_name.clear()
+    _ingredients_by_name.clear()
     reset_db()
 
 
+def teardown_function() -> None:
+    rollback_db()
+
+
 def test_auth_and_role_guard() -> None:
     staff_headers = auth_headers("staff1", "staff1234")
 
@@ -53,15 +192,14 @@ def test_auth_and_role_guard() -> None:
     assert analytics_res.status_code == 403
 
 
-def test_login_rate_limit_blocks_excessive_attempts() -> None:
-    for _ in range(10):
-        res = client.post("/api/auth/login", json={"username": "staff1", "password": "wrong-password"})
-        assert res.status_code == 401
-
-    blocked = client.post("/api/auth/login", json={"username": "staff1", "password": "wrong-password"})
-    assert blocked.status_code == 429
+def test_login_rate_limit_blocks_excessive_attempts_per_username() -> None:
+    failures, blocked = exhaust_login("staff1", "wrong-password")
+    assert failures == settings.login_rate_max_attempts
     assert blocked.json()["detail"] == "Too many login attempts. Please try again later."
 
+    other_user = client.post("/api/auth/login", json={"username": "manager1", "password": "manager1234"})
+    assert other_user.status_code == 200
+
 
 def test_login_rate_limit_does_not_count_successful_logins() -> None:
     for _ in range(12):
@@ -69,43 +207,52 @@ def test_login_rate_limit_does_not_count_successful_logins() -> None:
         assert res.status_code == 200
 
 
-def test_login_rate_limit_isolated_by_username() -> None:
-    for _ in range(10):
-        res = client.post("/api/auth/login", json={"username": "staff1", "password": "wrong-password"})
-        assert res.status_code == 401
+def test_redis_breaker_trips_once_for_concurrent_failures(monkeypatch: pytest.MonkeyPatch) -> None:
+    limiter = LoginRateLimiter(
+        window_seconds=60,
+        max_attempts=10,
+        redis_url="redis://unused",
+        redis_error_cooldown_seconds=30,
+        redis_error_max_cooldown_seconds=300,
+        redis_error_threshold=3,
+    )
 
-    other_user = client.post("/api/auth/login", json={"username": "manager1", "password": "manager1234"})
-    assert other_user.status_code == 200
+    async def fake_redis():
+        return object()
+
+    async def failing_call():
+        await asyncio.sleep(0)
+        raise ConnectionError("redis down")
+
+    async def run_concurrently():
+        return await asyncio.gather(*(limiter._with_breaker(failing_call, time()) for _ in range(10)))
+
+    monkeypatch.setattr(limiter, "_get_redis", fake_redis)
+    results = asyncio.run(run_concurrently())
+    assert all(result == (False, None) for result in results)
+    assert limiter._breaker_trips == 1
+    assert limiter._open_until <= time() + 30 * 1.5
+
+    limiter._breaker_trips = 16
+    assert all(limiter._next_cooldown() <= 300 for _ in range(100))
 
 
 def test_order_auto_pay_deduct_inventory() -> None:
     staff_headers = auth_headers("staff1", "staff1234")
-    manager_headers = auth_headers("manager1", "manager1234")
-
-    before_ingredients = client.get("/api/inventory/ingredients", headers=manager_headers).json()
-    egg_before = find_item(before_ingredients, "name", "Egg")["current_stock"]
-    bread_before = find_item(before_ingredients, "name", "Bread Slice")["current_stock"]
 
-    menu_items = client.get("/api/menu/items", headers=staff_headers).json()
-    toast = find_item(menu_items, "name", "Ham Egg Toast")
+    stock_before = stock_of("Egg", "Bread Slice")
+    egg_before = stock_before["Egg"]
+    bread_before = stock_before["Bread Slice"]
 
-    response = client.post(
-        "/api/orders",
-        headers=staff_headers,
-        json={
-            "source": "takeout",
-            "auto_pay": True,
-            "items": [{"menu_item_id": toast["id"], "quantity": 2}],
-        },
-    )
+    response = post_order(staff_headers, ("Ham Egg Toast", 2))
     assert response.status_code == 201
     created = response.json()
     assert created["payment_status"] == "paid"
     assert created["total_amount"] == 130
 
-    after_ingredients = client.get("/api/inventory/ingredients", headers=manager_headers).json()
-    egg_after = find_item(after_ingredients, "name", "Egg")["current_stock"]
-    bread_after = find_item(after_ingredients, "name", "Bread Slice")["current_stock"]
+    stock_after = stock_of("Egg", "Bread Slice")
+    egg_after = stock_after["Egg"]
+    bread_after = stock_after["Bread Slice"]
 
     assert egg_after == egg_before - 2
     assert bread_after == bread_before - 4
@@ -115,18 +262,7 @@ def test_kitchen_can_update_status() -> None:
     staff_headers = auth_headers("staff1", "staff1234")
     kitchen_headers = auth_headers("kitchen1", "kitchen1234")
 
-    menu_items = client.get("/api/menu/items", headers=staff_headers).json()
-    milk_tea = find_item(menu_items, "name", "Milk Tea")
-
-    create_res = client.post(
-        "/api/orders",
-        headers=staff_headers,
-        json={
-            "source": "dine_in",
-            "auto_pay": False,
-            "items": [{"menu_item_id": milk_tea["id"], "quantity": 1}],
-        },
-    )
+    create_res = post_order(staff_headers, ("Milk Tea", 1), auto_pay=False, source="dine_in")
     assert create_res.status_code == 201
     order_id = create_res.json()["id"]
 
@@ -138,23 +274,19 @@ def test_kitchen_can_update_status() -> None:
     assert status_res.status_code == 200
     assert status_res.json()["status"] == "preparing"
 
+    # The list endpoint serializes with orjson; timestamps must match the OrderOut detail view.
+    listed = index_by(client.get("/api/orders", headers=staff_headers).json(), "id")[order_id]
+    detail = client.get(f"/api/orders/{order_id}", headers=staff_headers).json()
+    assert {key: listed[key] for key in ("created_at", "paid_at", "completed_at")} == {
+        key: detail[key] for key in ("created_at", "paid_at", "completed_at")
+    }
+
 
 def test_analytics_overview_with_manager() -> None:
     staff_headers = auth_headers("staff1", "staff1234")
     manager_headers = auth_headers("manager1", "manager1234")
 
-    menu_items = client.get("/api/menu/items", headers=staff_headers).json()
-    toast = find_item(menu_items, "name", "Ham Egg Toast")
-
-    order_res = client.post(
-        "/api/orders",
-        headers=staff_headers,
-        json={
-            "source": "takeout",
-            "auto_pay": True,
-            "items": [{"menu_item_id": toast["id"], "quantity": 1}],
-        },
-    )
+    order_res = post_order(staff_headers, ("Ham Egg Toast", 1))
     assert order_res.status_code == 201
 
     analytics_res = client.get("/api/analytics/overview", headers=manager_headers)
@@ -169,8 +301,7 @@ def test_insufficient_inventory_blocks_auto_pay_order() -> None:
     staff_headers = auth_headers("staff1", "staff1234")
     manager_headers = auth_headers("manager1", "manager1234")
 
-    ingredients = client.get("/api/inventory/ingredients", headers=manager_headers).json()
-    egg = find_item(ingredients, "name", "Egg")
+    egg = get_ingredient("Egg")
     set_stock_res = client.put(
         f"/api/inventory/ingredients/{egg['id']}",
         headers=manager_headers,
@@ -178,18 +309,7 @@ def test_insufficient_inventory_blocks_auto_pay_order() -> None:
     )
     assert set_stock_res.status_code == 200
 
-    menu_items = client.get("/api/menu/items", headers=staff_headers).json()
-    toast = find_item(menu_items, "name", "Ham Egg Toast")
-
-    order_res = client.post(
-        "/api/orders",
-        headers=staff_headers,
-        json={
-            "source": "takeout",
-            "auto_pay": True,
-            "items": [{"menu_item_id": toast["id"], "quantity": 1}],
-        },
-    )
+    order_res = post_order(staff_headers, ("Ham Egg Toast", 1))
     assert order_res.status_code == 409
     payload = order_res.json()
     assert payload["detail"]["message"] == "Insufficient inventory"
@@ -203,28 +323,14 @@ def test_insufficient_inventory_blocks_auto_pay_order() -> None:
 def test_cancelled_order_restores_inventory() -> None:
     staff_headers = auth_headers("staff1", "staff1234")
     kitchen_headers = auth_headers("kitchen1", "kitchen1234")
-    manager_headers = auth_headers("manager1", "manager1234")
-
-    before_ingredients = client.get("/api/inventory/ingredients", headers=manager_headers).json()
-    egg_before = find_item(before_ingredients, "name", "Egg")["current_stock"]
 
-    menu_items = client.get("/api/menu/items", headers=staff_headers).json()
-    toast = find_item(menu_items, "name", "Ham Egg Toast")
+    egg_before = stock_of("Egg")["Egg"]
 
-    create_res = client.post(
-        "/api/orders",
-        headers=staff_headers,
-        json={
-            "source": "takeout",
-            "auto_pay": True,
-            "items": [{"menu_item_id": toast["id"], "quantity": 2}],
-        },
-    )
+    create_res = post_order(staff_headers, ("Ham Egg Toast", 2))
     assert create_res.status_code == 201
     order_id = create_res.json()["id"]
 
-    after_pay_ingredients = client.get("/api/inventory/ingredients", headers=manager_headers).json()
-    egg_after_pay = find_item(after_pay_ingredients, "name", "Egg")["current_stock"]
+    egg_after_pay = stock_of("Egg")["Egg"]
     assert egg_after_pay == egg_before - 2
 
     cancel_res = client.post(
@@ -235,13 +341,14 @@ def test_cancelled_order_restores_inventory() -> None:
     assert cancel_res.status_code == 200
     assert cancel_res.json()["status"] == "cancelled"
 
-    after_cancel_ingredients = client.get("/api/inventory/ingredients", headers=manager_headers).json()
-    egg_after_cancel = find_item(after_cancel_ingredients, "name", "Egg")["current_stock"]
+    egg_after_cancel = stock_of("Egg")["Egg"]
     assert egg_after_cancel == egg_before
 
 
 def test_audit_logs_capture_actions() -> None:
-    owner_headers = auth_headers("owner1", "owner1234")
+    # Fresh login so an auth.login audit row exists inside this test's transaction; the cached
+    # tokens stay valid, but the rows their logins wrote were rolled back with earlier tests.
+    owner_headers = {"Authorization": f"Bearer {login('owner1', 'owner1234')}"}
     manager_headers = auth_headers("manager1", "manager1234")
 
     create_user_res = client.post(
@@ -266,23 +373,12 @@ def test_audit_logs_capture_actions() -> None:
 
 def test_amend_paid_order_adjusts_inventory_delta() -> None:
     staff_headers = auth_headers("staff1", "staff1234")
-    manager_headers = auth_headers("manager1", "manager1234")
 
-    ingredients_before = client.get("/api/inventory/ingredients", headers=manager_headers).json()
-    egg_before = find_item(ingredients_before, "name", "Egg")["current_stock"]
+    egg_before = stock_of("Egg")["Egg"]
 
-    menu_items = client.get("/api/menu/items", headers=staff_headers).json()
-    toast = find_item(menu_items, "name", "Ham Egg Toast")
+    toast = get_menu_item("Ham Egg Toast")
 
-    create_res = client.post(
-        "/api/orders",
-        headers=staff_headers,
-        json={
-            "source": "takeout",
-            "auto_pay": True,
-            "items": [{"menu_item_id": toast["id"], "quantity": 1}],
-        },
-    )
+    create_res = post_order(staff_headers, ("Ham Egg Toast", 1))
     assert create_res.status_code == 201
     order_id = create_res.json()["id"]
 
@@ -299,8 +395,7 @@ def test_amend_paid_order_adjusts_inventory_delta() -> None:
     assert payload["diff"]["quantity_changed"][0]["before_quantity"] == 1
     assert payload["diff"]["quantity_changed"][0]["after_quantity"] == 3
 
-    ingredients_after_grow = client.get("/api/inventory/ingredients", headers=manager_headers).json()
-    egg_after_grow = find_item(ingredients_after_grow, "name", "Egg")["current_stock"]
+    egg_after_grow = stock_of("Egg")["Egg"]
     assert egg_after_grow == egg_before - 3
 
     amend_back_res = client.post(
@@ -316,8 +411,7 @@ def test_amend_paid_order_adjusts_inventory_delta() -> None:
     assert payload_back["diff"]["quantity_changed"][0]["before_quantity"] == 3
     assert payload_back["diff"]["quantity_changed"][0]["after_quantity"] == 1
 
-    ingredients_after_shrink = client.get("/api/inventory/ingredients", headers=manager_headers).json()
-    egg_after_shrink = find_item(ingredients_after_shrink, "name", "Egg")["current_stock"]
+    egg_after_shrink = stock_of("Egg")["Egg"]
     assert egg_after_shrink == egg_before - 1
 
 
@@ -326,8 +420,7 @@ def test_kitchen_can_view_low_stock() -> None:
     kitchen_headers = auth_headers("kitchen1", "kitchen1234")
     staff_headers = auth_headers("staff1", "staff1234")
 
-    ingredients = client.get("/api/inventory/ingredients", headers=manager_headers).json()
-    egg = find_item(ingredients, "name", "Egg")
+    egg = get_ingredient("Egg")
 
     update_res = client.put(
         f"/api/inventory/ingredients/{egg['id']}",
@@ -344,16 +437,24 @@ def test_kitchen_can_view_low_stock() -> None:
     assert staff_res.status_code == 403
 
 
-def test_manager_can_create_and_update_combo_rule() -> None:
-    manager_headers = auth_headers("manager1", "manager1234")
-    staff_headers = auth_headers("staff1", "staff1234")
+def test_import_payload_coerces_numeric_menu_item_names(tmp_path: Path) -> None:
+    payload_file = tmp_path / "menu.json"
+    payload_file.write_bytes(orjson.dumps({"menu_items": [{"name": 123, "price": 10}, {"name": " 紅茶 ", "price": 25}]}))
+    menu_items, combo_rules = load_payload(payload_file)
+    assert [item["name"] for item in menu_items] == ["123", "紅茶"]
+    assert combo_rules == []
+
+    payload_file.write_bytes(orjson.dumps({"menu_items": [{"name": None, "price": 10}]}))
+    with pytest.raises(ValueError, match=r"^menu_items\[1\]\.name: "):
+        load_payload(payload_file)
+
 
-    menu_items = client.get("/api/menu/items", headers=staff_headers).json()
-    milk_tea = find_item(menu_items, "name", "Milk Tea")
+def test_manager_can_create_and_update_combo_rule(ctx: dict) -> None:
+    milk_tea = ctx["menu"]["Milk Tea"]
 
     create_res = client.post(
         "/api/menu/combos",
-        headers=manager_headers,
+        headers=ctx["manager"],
         json={
             "code": "set40",
             "name": "40 Drink Set",
@@ -373,13 +474,13 @@ def test_manager_can_create_and_update_combo_rule() -> None:
     assert created["eligible_drinks"][0]["menu_item_id"] == milk_tea["id"]
     combo_id = created["id"]
 
-    list_res = client.get("/api/menu/combos", headers=staff_headers)
+    list_res = client.get("/api/menu/combos", headers=ctx["staff"])
     assert list_res.status_code == 200
     assert any(row["id"] == combo_id for row in list_res.json())
 
     update_res = client.put(
         f"/api/menu/combos/{combo_id}",
-        headers=manager_headers,
+        headers=ctx["manager"],
         json={
             "side_choice_count": 2,
             "side_options": [
@@ -395,19 +496,17 @@ def test_manager_can_create_and_update_combo_rule() -> None:
     assert len(updated["side_options"]) == 2
     assert updated["is_active"] is False
 
-    inactive_list_res = client.get("/api/menu/combos?active_only=false", headers=staff_headers)
+    inactive_list_res = client.get("/api/menu/combos?active_only=false", headers=ctx["staff"])
     assert inactive_list_res.status_code == 200
     assert any(row["id"] == combo_id and row["is_active"] is False for row in inactive_list_res.json())
 
 
-def test_staff_cannot_create_combo_rule() -> None:
-    staff_headers = auth_headers("staff1", "staff1234")
-    menu_items = client.get("/api/menu/items", headers=staff_headers).json()
-    milk_tea = find_item(menu_items, "name", "Milk Tea")
+def test_staff_cannot_create_combo_rule(ctx: dict) -> None:
+    milk_tea = ctx["menu"]["Milk Tea"]
 
     res = client.post(
         "/api/menu/combos",
-        headers=staff_headers,
+        headers=ctx["staff"],
         json={
             "code": "SET403",
             "name": "Forbidden Set",
@@ -421,17 +520,54 @@ def test_staff_cannot_create_combo_rule() -> None:
     assert res.status_code == 403
 
 
-def test_combo_order_uses_bundle_price_not_sum_of_items() -> None:
+def test_manager_can_bulk_upsert_menu_items() -> None:
     manager_headers = auth_headers("manager1", "manager1234")
-    staff_headers = auth_headers("staff1", "staff1234")
+    list_res = client.get("/api/menu/items", headers=manager_headers)
+    menu_by_name = index_by(list_res.json(), "name")
+    toast = menu_by_name["Ham Egg Toast"]
+    milk_tea = menu_by_name["Milk Tea"]
+    etag = list_res.headers["ETag"]
+    not_modified = client.get("/api/menu/items", headers={**manager_headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    res = client.post(
+        "/api/menu/items/bulk-upsert",
+        headers=manager_headers,
+        json={
+            "items": [
+                {"id": toast["id"], "name": "Ham Egg Toast Deluxe", "price": 75, "is_active": True},
+                {"name": "Milk Tea", "price": 33, "is_active": False},
+                {"name": "Black Tea", "price": 20},
+            ],
+        },
+    )
+    assert res.status_code == 200
+    rows = res.json()
+    assert [row["name"] for row in rows] == ["Ham Egg Toast Deluxe", "Milk Tea", "Black Tea"]
+    assert rows[0]["id"] == toast["id"]
+    assert rows[1]["id"] == milk_tea["id"]
+    assert rows[1]["price"] == 33
+    assert rows[1]["is_active"] is False
+    changed = client.get("/api/menu/items", headers={**manager_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+    duplicate_res = client.post(
+        "/api/menu/items/bulk-upsert",
+        headers=manager_headers,
+        json={"items": [{"name": "Black Tea", "price": 20}, {"name": "Black Tea", "price": 21}]},
+    )
+    assert duplicate_res.status_code == 400
 
-    menu_items = client.get("/api/menu/items", headers=staff_headers).json()
-    milk_tea = find_item(menu_items, "name", "Milk Tea")
-    toast = find_item(menu_items, "name", "Ham Egg Toast")
+
+def test_combo_order_uses_bundle_price_not_sum_of_items(ctx: dict) -> None:
+    milk_tea = ctx["menu"]["Milk Tea"]
+    toast = ctx["menu"]["Ham Egg Toast"]
 
     combo_res = client.post(
         "/api/menu/combos",
-        headers=manager_headers,
+        headers=ctx["manager"],
         json={
             "code": "SET60B",
             "name": "60 Bundle",
@@ -449,7 +585,7 @@ def test_combo_order_uses_bundle_price_not_sum_of_items() -> None:
 
     order_res = client.post(
         "/api/orders",
-        headers=staff_headers,
+        headers=ctx["staff"],
         json={
             "source": "takeout",
             "auto_pay": False,
@@ -470,60 +606,28 @@ def test_combo_order_uses_bundle_price_not_sum_of_items() -> None:
     assert round(sum(row["line_total"] for row in created["items"]), 2) == 60
 
 
-def test_order_number_collision_retries_and_succeeds() -> None:
+def test_order_number_collision_retries_and_succeeds(monkeypatch: pytest.MonkeyPatch) -> None:
     from app.services import orders as order_service
 
     staff_headers = auth_headers("staff1", "staff1234")
-    menu_items = client.get("/api/menu/items", headers=staff_headers).json()
-    milk_tea = find_item(menu_items, "name", "Milk Tea")
 
     sequence = iter(["ODTESTDUP1", "ODTESTDUP1", "ODTESTOK2"])
-    original = order_service.generate_order_number
-    order_service.generate_order_number = lambda: next(sequence)
-    try:
-        first_res = client.post(
-            "/api/orders",
-            headers=staff_headers,
-            json={
-                "source": "takeout",
-                "auto_pay": False,
-                "items": [{"menu_item_id": milk_tea["id"], "quantity": 1}],
-            },
-        )
-        assert first_res.status_code == 201
-        assert first_res.json()["order_number"] == "ODTESTDUP1"
-
-        second_res = client.post(
-            "/api/orders",
-            headers=staff_headers,
-            json={
-                "source": "takeout",
-                "auto_pay": False,
-                "items": [{"menu_item_id": milk_tea["id"], "quantity": 1}],
-            },
-        )
-        assert second_res.status_code == 201
-        assert second_res.json()["order_number"] == "ODTESTOK2"
-    finally:
-        order_service.generate_order_number = original
+    monkeypatch.setattr(order_service, "generate_order_number", lambda: next(sequence))
+
+    first_res = post_order(staff_headers, ("Milk Tea", 1), auto_pay=False)
+    assert first_res.status_code == 201
+    assert first_res.json()["order_number"] == "ODTESTDUP1"
+
+    second_res = post_order(staff_headers, ("Milk Tea", 1), auto_pay=False)
+    assert second_res.status_code == 201
+    assert second_res.json()["order_number"] == "ODTESTOK2"
 
 
 def test_pickup_board_public_endpoint_returns_active_pickup_orders() -> None:
     staff_headers = auth_headers("staff1", "staff1234")
     kitchen_headers = auth_headers("kitchen1", "kitchen1234")
 
-    menu_items = client.get("/api/menu/items", headers=staff_headers).json()
-    milk_tea = find_item(menu_items, "name", "Milk Tea")
-
-    create_res = client.post(
-        "/api/orders",
-        headers=staff_headers,
-        json={
-            "source": "takeout",
-            "auto_pay": True,
-            "items": [{"menu_item_id": milk_tea["id"], "quantity": 1}],
-        },
-    )
+    create_res = post_order(staff_headers, ("Milk Tea", 1))
     assert create_res.status_code == 201
     order_id = create_res.json()["id"]
 
@@ -552,32 +656,10 @@ def test_shift_open_and_close_summary() -> None:
     assert open_res.status_code == 201
     assert open_res.json()["status"] == "open"
 
-    menu_items = client.get("/api/menu/items", headers=staff_headers).json()
-    toast = find_item(menu_items, "name", "Ham Egg Toast")
-    milk_tea = find_item(menu_items, "name", "Milk Tea")
-
-    cash_order = client.post(
-        "/api/orders",
-        headers=staff_headers,
-        json={
-            "source": "takeout",
-            "auto_pay": True,
-            "payment_method": "cash",
-            "items": [{"menu_item_id": toast["id"], "quantity": 1}],
-        },
-    )
+    cash_order = post_order(staff_headers, ("Ham Egg Toast", 1), payment_method="cash")
     assert cash_order.status_code == 201
 
-    line_pay_order = client.post(
-        "/api/orders",
-        headers=staff_headers,
-        json={
-            "source": "takeout",
-            "auto_pay": True,
-            "payment_method": "line_pay",
-            "items": [{"menu_item_id": milk_tea["id"], "quantity": 1}],
-        },
-    )
+    line_pay_order = post_order(staff_headers, ("Milk Tea", 1), payment_method="line_pay")
     assert line_pay_order.status_code == 201
 
     close_res = client.post(